@@ -1,39 +1,28 @@
 #!/usr/bin/env python3
 
-from collections import deque
+from functools import lru_cache
 
-def neighbours3(index, elements):
-    actual_index = index
-    actual_elements = elements
-    if index == 0:
-        actual_index = 1
-
-        tmp_elements = deque(elements)
-        tmp_elements.rotate(1)
-        actual_elements = list(tmp_elements)
-    elif index == (len(elements) - 1):
-        actual_index = len(elements) - 2
-
-        tmp_elements = deque(elements)
-        tmp_elements.rotate(-1)
-        actual_elements = list(tmp_elements)
+import numpy as np
 
-    return actual_elements[(actual_index - 1):(actual_index + 2)]
+# Toroidal neighbourhood indices for every cell of a ring of the given size:
+# row i holds the indices of cells i - radius .. i + radius, wrapped around.
+# Tables are cached and read-only so they can be shared by every caller.
+@lru_cache(maxsize=None)
+def neighbourhood_table(size, radius):
+    offsets = np.arange(-radius, radius + 1)
+    table = (np.arange(size)[:, np.newaxis] + offsets) % size
+    table.setflags(write=False)
+    return table
 
-def neighbours5(index, elements):
-    actual_index = index
-    actual_elements = elements
-    if index < 2:
-        actual_index = 2
+def neighbours(index, elements, radius):
+    picked = [elements[i] for i in neighbourhood_table(len(elements), radius)[index]]
+    if isinstance(elements, str):
+        return ''.join(picked)
 
-        tmp_elements = deque(elements)
-        tmp_elements.rotate(2 - index)
-        actual_elements = list(tmp_elements)
-    elif index >= (len(elements) - 2):
-        actual_index = len(elements) - 3
+    return picked
 
-        tmp_elements = deque(elements)
-        tmp_elements.rotate(len(elements) - 1 - index - 2)
-        actual_elements = list(tmp_elements)
+def neighbours3(index, elements):
+    return neighbours(index, elements, 1)
 
-    return actual_elements[(actual_index - 2):(actual_index + 3)]
+def neighbours5(index, elements):
+    return neighbours(index, elements, 2)
@@ -1,16 +1,19 @@
 #!/usr/bin/env python3
 
 
+import argparse
 import math
 
-from neighbours import neighbours3
-from qiskit import QuantumCircuit
-from qiskit import Aer, execute
-from qiskit.aqua.components.oracles import TruthTableOracle
-from qiskit.circuit.reset import reset
-from qiskit.extensions.standard import barrier, h, swap, x
+import sparsestate
+from rules import DEFAULT_RULE, Rule1D
+
+# qiskit is imported by the functions that build and run circuits, so that
+# --sparse works without it
 
 def make_init_circuit(register, init_cells):
+    from qiskit import QuantumCircuit
+    from qiskit.extensions.standard import h, x
+
     init_circuit = QuantumCircuit(register)
     for i, v in enumerate(init_cells[::-1]):
         if v == '0':
@@ -24,6 +27,9 @@ def make_init_circuit(register, init_cells):
     return init_circuit
 
 def make_barrier_circuit(regs):
+    from qiskit import QuantumCircuit
+    from qiskit.extensions.standard import barrier
+
     circuit = QuantumCircuit(*regs)
     for r in regs:
         circuit.barrier(r)
@@ -31,38 +37,78 @@ def make_barrier_circuit(regs):
     return circuit
 
 def make_swap_circuit(reg01, reg02):
+    from qiskit import QuantumCircuit
+    from qiskit.extensions.standard import swap
+
     circuit = QuantumCircuit(reg01, reg02)
     circuit.swap(reg01, reg02)
 
     return circuit
 
 def make_reset_circuit(regs):
+    from qiskit import QuantumCircuit
+    from qiskit.circuit.reset import reset
+
     circuit = QuantumCircuit(*regs)
     for r in regs:
         circuit.reset(r)
 
     return circuit
 
-def make_oracle(qcount):
-    bitmaps = [''] * qcount
-
-    for raw_value in range(2**qcount):
-        value = format(raw_value, '0{}b'.format(qcount))[::-1]
-    
-        for index in range(qcount):
-            n = neighbours3(index, value)
-    
-            alive_count = 1 if n[0] == '1' else 0
-            alive_count += 1 if n[2] == '1' else 0
-    
-            if n[1] == '0' and alive_count == 2:
-                bitmaps[index] += '1'
-            elif n[1] == '1' and alive_count == 1:
-                bitmaps[index] += '1'
-            else:
-                bitmaps[index] += '0'
-
-    return TruthTableOracle(bitmaps)
+def make_oracle(qcount, rule=DEFAULT_RULE):
+    from qiskit.aqua.components.oracles import TruthTableOracle
+
+    return TruthTableOracle(rule.bitmaps(qcount))
+
+def make_step_circuit(oracle, oracle_circuit, qregs):
+    # One generation on top of a state that already holds the previous
+    # generation in the output register: move it back to the input register,
+    # clear the scratch registers and run the same oracle again
+    barrier_circuit = make_barrier_circuit(qregs)
+    swap_circuit = make_swap_circuit(oracle.output_register,
+                                     oracle.variable_register)
+    reset_circuit = make_reset_circuit([oracle.output_register,
+                                        oracle.ancillary_register])
+
+    return barrier_circuit + swap_circuit + reset_circuit + oracle_circuit
+
+def run_generations(init_cells, generations, backend=None, rule=DEFAULT_RULE):
+    '''
+    Advances init_cells through the given number of generations and yields
+    (generation, summary) after each one. The step circuit is compiled once
+    and every generation starts from the previous statevector, so only the
+    current state is kept and each extra generation costs one step.
+    '''
+    from qiskit import Aer, assemble, execute, transpile
+
+    if backend is None:
+        backend = Aer.get_backend('statevector_simulator')
+
+    qcount = len(init_cells)
+    oracle = make_oracle(qcount, rule)
+    oracle_circuit = oracle.construct_circuit()
+    init_circuit = make_init_circuit(oracle.variable_register, init_cells)
+    first_circuit = init_circuit + oracle_circuit
+
+    cell_range_start = oracle.ancillary_register.size
+    cell_range_end = cell_range_start + oracle.output_register.size
+    extract_cells = lambda index: index[cell_range_start:cell_range_end]
+
+    if generations < 1:
+        return
+
+    result = execute(first_circuit, backend).result()
+    state = result.get_statevector(first_circuit)
+    yield 1, vector_state_to_summary(state, extract_cells)
+
+    step_circuit = make_step_circuit(oracle, oracle_circuit,
+                                     first_circuit.qregs)
+    step_qobj = assemble(transpile(step_circuit, backend))
+    for generation in range(2, generations + 1):
+        result = backend.run(step_qobj, backend_options={
+            'initial_statevector': state}).result()
+        state = result.get_statevector()
+        yield generation, vector_state_to_summary(state, extract_cells)
 
 def vector_state_to_summary(state, extract_cells):
     summary = {}
@@ -105,49 +151,33 @@ def format_cells(cells):
 
     return ' '.join(output)
 
-init_cells = 'XXX'
-print('Input:')
-print_cells(init_cells)
-
-qcount = len(init_cells)
-oracle = make_oracle(qcount)
-
-oracle_circuit = oracle.construct_circuit()
-init_circuit = make_init_circuit(oracle.variable_register, init_cells)
-circuit = init_circuit + oracle_circuit
-
-backend_sim = Aer.get_backend('statevector_simulator')
-result = execute(circuit, backend_sim).result()
-state = result.get_statevector(circuit)
-
-cell_range_start = oracle.ancillary_register.size
-cell_range_end = cell_range_start + oracle.output_register.size
-extract_cells = lambda index: index[cell_range_start:cell_range_end]
-summary = vector_state_to_summary(state, extract_cells)
-
-print('Output:')
-min_prob = 0 #(1 / len(summary)) - 0.00001
-print_summary(summary, min_prob)
-
-oracle2 = make_oracle(qcount)
-
-oracle2_circuit = oracle2.construct_circuit()
-barrier_circuit = make_barrier_circuit(oracle2_circuit.qregs)
-swap_circuit = make_swap_circuit(oracle.output_register,
-                                 oracle2.variable_register)
-reset_circuit = make_reset_circuit([oracle2.output_register, oracle2.ancillary_register])
-circuit2 = (init_circuit + oracle_circuit +
-            barrier_circuit + swap_circuit + reset_circuit + oracle2_circuit)
-##print(circuit2)
-
-result = execute(circuit2, backend_sim).result()
-state = result.get_statevector(circuit2)
-
-cell_range_start = oracle2.ancillary_register.size
-cell_range_end = cell_range_start + oracle2.output_register.size
-extract_cells = lambda index: index[cell_range_start:cell_range_end]
-summary = vector_state_to_summary(state, extract_cells)
-
-print('Output:')
-min_prob = 0 #(1 / len(summary)) - 0.00001
-print_summary(summary, min_prob)
+def main(init_cells, generations, rule=DEFAULT_RULE, sparse=False):
+    print('Input:')
+    print_cells(init_cells)
+
+    run = sparsestate.run_generations if sparse else run_generations
+    min_prob = 0 #(1 / len(summary)) - 0.00001
+    for generation, summary in run(init_cells, generations, rule=rule):
+        print('Output:')
+        print_summary(summary, min_prob)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='1D Quantum Game of Life')
+    parser.add_argument('--cells', default='XXX',
+                        help="Initial cells: '0' dead, '1' alive, any other "
+                             "character in superposition (default: XXX)")
+    parser.add_argument('--generations', type=int, default=2,
+                        help='Number of generations (default: 2)')
+    parser.add_argument('--rule', default=str(DEFAULT_RULE),
+                        help='Radius and birth/survival counts, e.g. R2/B23/S1 '
+                             '(default: {})'.format(DEFAULT_RULE))
+    parser.add_argument('--sparse', action='store_true',
+                        help='Keep only the populated basis states of the cells '
+                             'instead of the full statevector (no qiskit needed): '
+                             'the cost grows with 2^(superposed cells), not with '
+                             'the length of the ring. From the second generation on '
+                             'it sums over every initial state instead of following '
+                             'one measured at random (see sparsestate.py)')
+    args = parser.parse_args()
+
+    main(args.cells, args.generations, Rule1D.parse(args.rule), args.sparse)
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+
+import numpy as np
+
+from neighbours import neighbourhood_table
+
+# Birth/survival rule for a 1D ring where each cell sees `radius` cells on
+# each side. Counts are the number of live neighbours, the cell excluded.
+class Rule1D:
+    def __init__(self, radius, birth, survival):
+        self.radius = radius
+        self.birth = frozenset(birth)
+        self.survival = frozenset(survival)
+
+        max_count = 2 * radius
+        for count in self.birth | self.survival:
+            if not 0 <= count <= max_count:
+                raise ValueError('Neighbour count {} out of range for radius {}'.format(count, radius))
+
+        # next state indexed by [current state, live neighbour count]
+        self.table = np.zeros((2, max_count + 1), dtype=np.uint8)
+        self.table[0, sorted(self.birth)] = 1
+        self.table[1, sorted(self.survival)] = 1
+
+    # Parses rules such as 'R1/B2/S1' or 'R3/B2,3/S1,4'. Without commas each
+    # digit is a separate count. The radius defaults to 1.
+    @classmethod
+    def parse(cls, spec):
+        radius = 1
+        birth = ()
+        survival = ()
+        for part in spec.upper().split('/'):
+            if not part:
+                continue
+            key, counts = part[0], part[1:]
+            if ',' in counts:
+                values = [int(c) for c in counts.split(',') if c]
+            else:
+                values = [int(c) for c in counts]
+
+            if key == 'R':
+                radius = int(counts)
+            elif key == 'B':
+                birth = values
+            elif key == 'S':
+                survival = values
+            else:
+                raise ValueError('Invalid rule part: {}'.format(part))
+
+        return cls(radius, birth, survival)
+
+    def __str__(self):
+        def fmt(counts):
+            sep = ',' if self.radius > 4 else ''
+            return sep.join(str(c) for c in sorted(counts))
+
+        return 'R{}/B{}/S{}'.format(self.radius, fmt(self.birth), fmt(self.survival))
+
+    # Advances every ring in `cells` (shape (..., size), values 0/1) by one
+    # generation at once.
+    def step(self, cells):
+        cells = np.asarray(cells, dtype=np.uint8)
+        table = neighbourhood_table(cells.shape[-1], self.radius)
+        counts = cells[..., table].sum(axis=-1, dtype=np.intp) - cells
+        return self.table[cells, counts]
+
+    # Truth table of every output cell over all 2**qcount input rings, in the
+    # layout expected by TruthTableOracle: bit i of the input index is cell i.
+    def bitmaps(self, qcount):
+        inputs = np.arange(2**qcount)[:, np.newaxis]
+        cells = (inputs >> np.arange(qcount)) & 1
+        outputs = self.step(cells)
+
+        return [''.join('1' if v else '0' for v in outputs[:, index])
+                for index in range(qcount)]
+
+# The rule of the original demo: a dead cell with both neighbours alive is
+# born, a live cell with exactly one live neighbour survives.
+DEFAULT_RULE = Rule1D(1, birth=[2], survival=[1])
+
+# Classical bulk simulation, yielding each new generation of `cells`.
+def simulate(rule, cells, generations):
+    cells = np.asarray(cells, dtype=np.uint8)
+    for _ in range(generations):
+        cells = rule.step(cells)
+        yield cells
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+
+import numpy as np
+
+from rules import DEFAULT_RULE
+
+# Sparse simulation of the 1D quantum game: instead of the statevector of
+# every qubit of the oracle circuit, only the populated basis states of the
+# cells are kept, as a (K, size) array of 0/1 cells (row k is basis state k,
+# column i is cell i) and the K amplitudes. The oracle maps each basis state
+# to the next generation, so a generation is one bulk rule.step over the K
+# rows, and states that become equal are merged by adding their amplitudes,
+# as the summary of the statevector does. K starts at 2**(superposed cells)
+# and never grows, whatever the size of the ring.
+#
+# The summary of generation g adds up the amplitudes of every initial basis
+# state that ends up as each pattern, as if the oracle were applied g times
+# without ever resetting a register. For the first generation that is
+# exactly the summary of the statevector run. From the second generation
+# on the statevector run differs: its step circuit resets the register that
+# holds the generation before last, which is entangled with the current one,
+# and the simulator does that reset by measuring it. The run then follows a
+# single initial basis state, drawn with probability |amplitude|^2, and its
+# summary is the one pattern that state has become, with an amplitude of
+# magnitude 1. That pattern is always one of the keys of the sparse summary.
+
+class SparseState:
+    def __init__(self, cells, amplitudes):
+        self.cells = np.asarray(cells, dtype=np.uint8)
+        self.amplitudes = np.asarray(amplitudes, dtype=complex)
+
+    # State prepared by make_init_circuit: '0' dead, '1' alive, any other
+    # character in an equal superposition of both. The string is read the
+    # same way, its last character being cell 0.
+    @classmethod
+    def from_string(cls, init_cells):
+        init_cells = init_cells[::-1]
+        size = len(init_cells)
+        superposed = [i for i, v in enumerate(init_cells) if v not in '01']
+        count = 2**len(superposed)
+
+        cells = np.zeros((count, size), dtype=np.uint8)
+        cells[:, [i for i, v in enumerate(init_cells) if v == '1']] = 1
+        cells[:, superposed] = (np.arange(count)[:, np.newaxis] >> np.arange(len(superposed))) & 1
+        amplitudes = np.full(count, 2**(-len(superposed) / 2), dtype=complex)
+
+        return cls(cells, amplitudes)
+
+    def __len__(self):
+        return len(self.amplitudes)
+
+    # Adds up the amplitudes of equal basis states and drops the ones that
+    # cancel out
+    def merged(self):
+        cells, inverse = np.unique(self.cells, axis=0, return_inverse=True)
+        amplitudes = np.zeros(len(cells), dtype=complex)
+        np.add.at(amplitudes, inverse.reshape(-1), self.amplitudes)
+
+        nonzero = amplitudes != 0
+        return SparseState(cells[nonzero], amplitudes[nonzero])
+
+    def step(self, rule=DEFAULT_RULE):
+        return SparseState(rule.step(self.cells), self.amplitudes).merged()
+
+    # Amplitude of every cell pattern, keyed like vector_state_to_summary
+    # (the last character being cell 0)
+    def summary(self):
+        return {''.join('1' if v else '0' for v in row[::-1]): value
+                for row, value in zip(self.cells, self.amplitudes)}
+
+def run_generations(init_cells, generations, rule=DEFAULT_RULE):
+    '''
+    Like onedgameoflife.run_generations, without qiskit: yields (generation,
+    summary) after each generation. Summaries match the statevector run for
+    the first generation only, see the comment at the top of this module.
+    '''
+    state = SparseState.from_string(init_cells).merged()
+    for generation in range(1, generations + 1):
+        state = state.step(rule)
+        yield generation, state.summary()
@@ -1,48 +1,91 @@
 import sys
 
 import pygame
-import thorpy
-import copy, math, random
 import numpy as np
 import argparse
-import json
 
-from qrules import DSQGOL, SQGOL, liveliness
-
-pygame.init()
+# The engine (grids, rules, backends, I/O) lives in the qgol package, which
+# imports neither pygame nor thorpy; this module is the GUI and the CLI.
+from qgol.backends import BACKENDS, DEFAULT_BACKEND, get_backend
+from qgol.dmkernel import amplitudes, pure_density
+from qgol.editing import EditQueue
+from qgol.grid import (SUPERPOSITION_DOWN_LIMIT, SUPERPOSITION_UP_LIMIT, Grid,
+                       init_grid_file, init_grid_random, random_cells, step_grids)
+from qgol.headless import run_headless
+from qgol.history import DEFAULT_MAX_BYTES, History
+from qgol.liferule import CONWAY, LifeRule
+from qgol.neighbours import BOUNDARIES, DEFAULT_BOUNDARY
+from qgol.observables import ColumnLog, measure
+from qgol.render import INTERSPACE, LINE_WIDTH, PIXEL_SIZE
+from qgol.stream import BoardStream
+from qgol.viewport import Camera
 
 # Interface Constants
-PIXEL_SIZE = 10
-LINE_WIDTH = 4
 WIN_WIDTH = 600
 WIN_HEIGHT = 400
-WIN_INTERSPACE = 50
+WIN_INTERSPACE = INTERSPACE
 Y_LIMIT = WIN_HEIGHT // PIXEL_SIZE
 X_LIMIT = WIN_WIDTH // PIXEL_SIZE
 
 # Quantum Constants
-ALIVE = np.array([1, 0])
-DEAD = np.array([0, 1])
 SUPERPOSITION_UP_LIMIT_ARG = 'sp_up'
-SUPERPOSITION_UP_LIMIT_VAL = 0.51
+SUPERPOSITION_UP_LIMIT_VAL = SUPERPOSITION_UP_LIMIT
 SUPERPOSITION_DOWN_LIMIT_ARG = 'sp_down'
-SUPERPOSITION_DOWN_LIMIT_VAL = 0.48
+SUPERPOSITION_DOWN_LIMIT_VAL = SUPERPOSITION_DOWN_LIMIT
 
 FILE_ARG = 'json'
+RULE_ARG = 'rule'
+SEED_ARG = 'seed'
+BOARD_SIZE_ARG = 'board_size'
+BRUSH_ARG = 'brush'
+SERVE_ARG = 'serve'
+LOG_ARG = 'log'
+FULLY_QUANTUM_ARG = 'fully_quantum'
+BACKEND_ARG = 'backend'
+WORKERS_ARG = 'workers'
+HISTORY_ARG = 'history_mb'
+UNBOUNDED_ARG = 'unbounded'
+BOUNDARY_ARG = 'boundary'
 
 #Update every 2ms
 REFRESH_DEFAULT = 2
 # REFRESH_DEFAULT = 0.1*1000
 TARGET_FPS = 60
 
+# Pixels the view moves by for each arrow key press
+CAMERA_PAN_STEP = 5 * PIXEL_SIZE
+CAMERA_PAN_KEYS = {
+    pygame.K_LEFT: (CAMERA_PAN_STEP, 0),
+    pygame.K_RIGHT: (-CAMERA_PAN_STEP, 0),
+    pygame.K_UP: (0, CAMERA_PAN_STEP),
+    pygame.K_DOWN: (0, -CAMERA_PAN_STEP),
+}
+
 class GameState:
     game_paused = False
     step_forward = False
+    step_backward = False
 
-    def __init__(self, sp_up_limit=SUPERPOSITION_UP_LIMIT_VAL, sp_down_limit=SUPERPOSITION_DOWN_LIMIT_VAL, file_path=None, refresh_rate=REFRESH_DEFAULT):
+    def __init__(self, sp_up_limit=SUPERPOSITION_UP_LIMIT_VAL, sp_down_limit=SUPERPOSITION_DOWN_LIMIT_VAL, file_path=None, refresh_rate=REFRESH_DEFAULT, rule=CONWAY, seed=None, board_shape=(X_LIMIT, Y_LIMIT), brush_radius=0, stream=None, log=None, fully_quantum=False, backend=None, history_bytes=DEFAULT_MAX_BYTES, boundary=DEFAULT_BOUNDARY):
         '''
-        Inputs: Superposition limits and optional file to load from
+        Inputs: Superposition limits, optional file to load from, the Life-like rule,
+        the seed used for random boards and new quantum cells, the board size in cells,
+        the radius of the brush used to draw cells, an optional BoardStream
+        to publish every generation to, an optional ColumnLog for observables,
+        whether to run the fully quantum (DSQGOL) board as well, the backend
+        that steps the boards (default: numpy), the memory kept for stepping back
+        and what lies past the edges of the boards (see qgol.neighbours)
         '''
+        self.rule = rule
+        self.boundary = boundary
+        self.backend = backend or get_backend()
+        self.fully_quantum = fully_quantum
+        self.history_bytes = history_bytes
+        self.stream = stream
+        self.log = log
+        self.board_shape = board_shape
+        self.brush_radius = brush_radius
+        self.seed = seed
         self.sp_up_limit = sp_up_limit
         self.sp_down_limit = sp_down_limit
         self.file_path = file_path
@@ -61,10 +104,16 @@ class GameState:
         self.step_forward = True
         return
 
+    def rewind_simulation(self):
+        self.step_backward = True
+        return
+
     def clear_grids(self):
         return
 
     def setup(self):
+        import thorpy
+
         print(f'file_path: {self.file_path}')
 
         ##### SETTING UP THE BACKGROUNDS
@@ -112,41 +161,54 @@ class GameState:
                 drawBlankSpace(interspace_horizontal, x, y)
 
         # Fully Quantum GOL Setup
-        # rect_fully_quantum = pygame.Rect(0, 0, WIN_WIDTH, WIN_HEIGHT)
-        background_fully_quantum = None
-        # background_fully_quantum = background_Final.subsurface(rect_quantum)
-        # background_fully_quantum = background_fully_quantum.convert()
-        # background_fully_quantum.fill((0, 0, 0))
+        self.background_fully_quantum = None
+        if self.fully_quantum:
+            rect_fully_quantum = pygame.Rect(WIN_WIDTH + WIN_INTERSPACE, WIN_HEIGHT + WIN_INTERSPACE,
+                                             WIN_WIDTH, WIN_HEIGHT)
+            self.background_fully_quantum = background_Final.subsurface(rect_fully_quantum)
+            self.background_fully_quantum = self.background_fully_quantum.convert()
+            self.background_fully_quantum.fill((0, 0, 0))
 
         #####
         self.clock = pygame.time.Clock()
 
         self.isActive = True
         self.actionDown = False
+        self.panning = False
 
         self.final = pygame.time.get_ticks()
-        self.grid_quantum = Grid()
-        self.grid_classical = Grid()
-        # grid_fully_quantum = Grid()
+        self.generation = 0
+        self.camera = Camera(self.board_shape, (WIN_WIDTH, WIN_HEIGHT), PIXEL_SIZE, LINE_WIDTH)
+        self.edits = EditQueue(self.board_shape, self.brush_radius, self.boundary)
+        self.history = History(self.history_bytes)
+        self.grid_quantum = Grid(shape=self.board_shape)
+        self.grid_classical = Grid(shape=self.board_shape)
         self.grid_fully_quantum = None
         self.debug = debugText(self.screen, self.clock)
 
+        self.rng = np.random.default_rng(self.seed)
+
         #Create the orginal grid pattern randomly
         if self.file_path is None:
             init_grid_random(self.sp_up_limit, self.sp_down_limit, self.grid_quantum,
-                             self.background_quantum, self.grid_classical,
-                             self.background_classical, self.grid_fully_quantum,
-                             background_fully_quantum)
+                             self.grid_classical, self.rng)
         else:
-            init_grid_file(self.file_path, self.grid_quantum, self.background_quantum,
-                           self.grid_classical, self.background_classical,
-                           self.grid_fully_quantum, background_fully_quantum)
+            init_grid_file(self.file_path, self.grid_quantum, self.grid_classical)
+        if self.fully_quantum:
+            self.grid_fully_quantum = Grid(pure_density(self.grid_quantum.grid))
+        self.remember()
+        self.draw_boards()
+        self.publish()
+        if self.log is not None:
+            self.log.write(measure(self.generation, self.grid_quantum.grid, self.grid_classical.grid,
+                                   fully_quantum=self.fully_quantum_board()))
 
         self.screen.blit(self.background_classical, (0, 0))
         self.screen.blit(interspace, (WIN_WIDTH, 0))
         self.screen.blit(self.background_quantum, (WIN_WIDTH + WIN_INTERSPACE, 0))
         self.screen.blit(interspace_horizontal, (0, WIN_HEIGHT))
-        # self.screen.blit(background_quantum, (WIN_WIDTH / 2 + WIN_INTERSPACE / 2, WIN_HEIGHT + WIN_INTERSPACE)) # this is actually the fully quantum area
+        if self.fully_quantum:
+            self.screen.blit(self.background_fully_quantum, (WIN_WIDTH + WIN_INTERSPACE, WIN_HEIGHT + WIN_INTERSPACE))
 
         # add labels
         addLabel('Classical', (WIN_WIDTH / 2, WIN_HEIGHT + WIN_INTERSPACE/2), self.screen)
@@ -167,8 +229,9 @@ class GameState:
         self.button_toggle_pause = thorpy.Togglable("Pause")
 
         self.button_next_step = thorpy.make_button("Next step", func=self.advance_simulation)
+        self.button_previous_step = thorpy.make_button("Step back", func=self.rewind_simulation)
         self.button_cleargrids = thorpy.make_button("Clear grids", func=self.clear_grids)
-        self.button_quit = thorpy.make_button("Quit", func=thorpy.functions.quit_func)
+        self.button_quit = thorpy.make_button("Quit", func=self.quit)
         self.dropdownlist_add_mode_classical = thorpy.DropDownListLauncher(const_text="Choose:",
                                                    var_text="",
                                                    titles=[str(i) * i for i in range(1, 9)])
@@ -178,18 +241,21 @@ class GameState:
         self.dropdownlist_add_mode_quantum = thorpy.DropDownListLauncher(const_text="Choose:",
                                                    var_text="",
                                                    titles=[str(i) * i for i in range(1, 9)])
+        # the controls share the bottom row with the fully quantum board
+        box_width = WIN_WIDTH if self.fully_quantum else self.screen.get_size()[0]
         self.box = thorpy.Box(elements=[
                                         # self.button_start,
                                         # self.button_pause,
                                         self.button_toggle_pause,
                                         self.button_next_step,
+                                        self.button_previous_step,
                                         # self.button_cleargrids,
                                         self.slider,
                                         self.slider_sp_down_limit,
                                         self.slider_sp_up_limit,
                                         # self.dropdownlist_add_mode_classical,
                                         self.button_quit,
-                                        ], size=(self.screen.get_size()[0],WIN_HEIGHT))
+                                        ], size=(box_width,WIN_HEIGHT))
         # we regroup all elements on a menu, even if we do not launch the menu
         self.menu = thorpy.Menu(self.box)
         # important : set the screen as surface for all elements
@@ -204,177 +270,191 @@ class GameState:
 
         return
 
+    # Closing the window and the Quit button both end here, so the log is
+    # written out and the backend's threads are stopped either way
+    def quit(self):
+        print('QUITTING')
+        if self.log is not None:
+            self.log.close()
+        self.backend.close()
+        pygame.quit()
+        sys.exit()
+
+    def publish(self):
+        if self.stream is not None:
+            self.stream.publish(self.generation, self.grid_quantum.grid, self.grid_classical.grid)
+
+    def fully_quantum_board(self):
+        return self.grid_fully_quantum.grid if self.fully_quantum else None
+
+    # Renders the visible part of the boards through the camera
+    def draw_boards(self):
+        pygame.surfarray.blit_array(self.background_classical,
+                                    self.camera.render_classical(self.grid_classical.grid).swapaxes(0, 1))
+        pygame.surfarray.blit_array(self.background_quantum,
+                                    self.camera.render_quantum(self.grid_quantum.grid).swapaxes(0, 1))
+        if self.fully_quantum:
+            pygame.surfarray.blit_array(self.background_fully_quantum,
+                                        self.camera.render_quantum(amplitudes(self.grid_fully_quantum.grid)).swapaxes(0, 1))
+
+    # Position of the mouse inside one of the board views, or None
+    def view_position(self, pos):
+        views = [(0, 0), (WIN_WIDTH + WIN_INTERSPACE, 0)]
+        if self.fully_quantum:
+            views.append((WIN_WIDTH + WIN_INTERSPACE, WIN_HEIGHT + WIN_INTERSPACE))
+        for left, top in views:
+            px, py = pos[0] - left, pos[1] - top
+            if self.camera.contains(px, py):
+                return px, py
+        return None
+
+    # Camera controls: mouse wheel zooms at the cursor, right button drags the
+    # boards, arrow keys pan, +/- zoom and Home resets the view.
+    # Returns True if the event was handled.
+    def handle_camera_event(self, event):
+        if event.type == pygame.MOUSEWHEEL:
+            anchor = self.view_position(pygame.mouse.get_pos())
+            if anchor is None:
+                return False
+            self.camera.zoom(event.y, anchor)
+        elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 3:
+            self.panning = self.view_position(event.pos) is not None
+            return self.panning
+        elif event.type == pygame.MOUSEBUTTONUP and event.button == 3:
+            self.panning = False
+            return True
+        elif event.type == pygame.MOUSEMOTION and self.panning:
+            self.camera.pan(*event.rel)
+        elif event.type == pygame.KEYDOWN and event.key in CAMERA_PAN_KEYS:
+            self.camera.pan(*CAMERA_PAN_KEYS[event.key])
+        elif event.type == pygame.KEYDOWN and event.key in (pygame.K_PLUS, pygame.K_EQUALS, pygame.K_KP_PLUS):
+            self.camera.zoom(1)
+        elif event.type == pygame.KEYDOWN and event.key in (pygame.K_MINUS, pygame.K_KP_MINUS):
+            self.camera.zoom(-1)
+        elif event.type == pygame.KEYDOWN and event.key == pygame.K_HOME:
+            self.camera.home()
+        else:
+            return False
+
+        self.edits.lift()
+        self.draw_boards()
+        return True
+
+    # Drawing on the classical view: left button strokes are queued in
+    # self.edits and [ / ] change the brush size.
+    # Returns True if the event was handled.
+    def handle_edit_event(self, event):
+        if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1 and self.camera.contains(*event.pos):
+            self.edits.begin_stroke(self.camera.screen_to_view_cell(*event.pos), self.grid_classical)
+        elif event.type == pygame.MOUSEMOTION and self.edits.painting:
+            if self.camera.contains(*event.pos):
+                self.edits.paint(self.camera.screen_to_view_cell(*event.pos))
+            else:
+                self.edits.lift()
+        elif event.type == pygame.MOUSEBUTTONUP and event.button == 1:
+            self.edits.end_stroke()
+        elif event.type == pygame.KEYDOWN and event.key == pygame.K_LEFTBRACKET:
+            self.edits.brush_radius -= 1
+        elif event.type == pygame.KEYDOWN and event.key == pygame.K_RIGHTBRACKET:
+            self.edits.brush_radius += 1
+        else:
+            return False
+
+        return True
+
+    # Writes the queued edits to the boards in one go
+    def apply_edits(self):
+        new_quantum_cells = lambda count: random_cells((count,), self.sp_up_limit, self.sp_down_limit, self.rng)
+        if self.edits.apply(self.grid_quantum, self.grid_classical, new_quantum_cells, self.grid_fully_quantum):
+            self.remember()
+            self.draw_boards()
+            self.publish()
+
+    # Records the current generation in the history, replacing what it held
+    # for this generation and after (stepping back and then editing or
+    # stepping forward starts a new timeline)
+    def remember(self):
+        boards = (self.grid_quantum.grid, self.grid_classical.grid)
+        if self.fully_quantum:
+            boards += (self.grid_fully_quantum.grid,)
+        self.history.record(self.generation, boards)
+
+    # Goes back one generation, if the history still holds it
+    def step_back(self):
+        if self.generation - 1 not in self.history:
+            return
+
+        self.generation -= 1
+        boards = self.history.get(self.generation)
+        self.grid_quantum, self.grid_classical = Grid(boards[0]), Grid(boards[1])
+        if self.fully_quantum:
+            self.grid_fully_quantum = Grid(boards[2])
+        self.draw_boards()
+        self.publish()
+
     def run(self):
         # game loop start
         while self.isActive:
 
             self.clock.tick(TARGET_FPS)
-            newgrid_quantum = Grid()
-            newgrid_classical = Grid()
-            # newgrid_fully_quantum = None #Grid()
 
             self.refresh_rate = self.slider.get_value()
             self.sp_up_limit = self.slider_sp_up_limit.get_value()
             self.sp_down_limit = self.slider_sp_down_limit.get_value()
             self.game_paused = self.button_toggle_pause.toggled
-            if (pygame.time.get_ticks() - self.final > self.refresh_rate and not self.game_paused) or self.step_forward:
+            if self.step_backward:
+                self.step_backward = False
+                self.step_back()
+                self.final = pygame.time.get_ticks()
+            elif (pygame.time.get_ticks() - self.final > self.refresh_rate and not self.game_paused) or self.step_forward:
                 self.step_forward = False
-                self.background_quantum.fill((0, 0, 0))
-                self.background_classical.fill((0, 0, 0))
-
-                for x in range(0, X_LIMIT):
-                    for y in range(0, Y_LIMIT):
-                        subgrid = self.grid_quantum.getNeighboursAround(x, y)
-                        newgrid_quantum.setCell(x, y, SQGOL(subgrid))
-                        drawSquare(self.background_quantum, x, y,
-                                   newgrid_quantum.getCell(x, y))
-                        #Classic game of life
-                        if (self.grid_classical.getCell(x, y) == ALIVE).all():
-                            count = self.grid_classical.countNeighbours(x, y)
-                            if count < 2:
-                                newgrid_classical.setCell(x, y, DEAD)
-
-                            elif count <= 3:
-                                newgrid_classical.setCell(x, y, ALIVE)
-                                drawSquareClassic(self.background_classical, x, y)
-
-                            elif count >= 4:
-                                newgrid_classical.setCell(x, y, DEAD)
-                        else:
-                            if self.grid_classical.countNeighbours(x, y) == 3:
-                                newgrid_classical.setCell(x, y, ALIVE)
-                                drawSquareClassic(self.background_classical, x, y)
-
-                        # subgrid_fully_quantum = grid_fully_quantum.getNeighboursAround(x, y)
-                        # newgrid_fully_quantum.setCell(x, y, DSQGOL(subgrid_fully_quantum)) # disabled, as it causes crashes with qiskit 0.36.1
-                        # drawSquare(background_fully_quantum, x, y,
-                        #            newgrid_fully_quantum.getCell(x, y))
 
-                self.final = pygame.time.get_ticks()
+                previous_quantum, previous_classical = self.grid_quantum, self.grid_classical
+                self.grid_quantum, self.grid_classical = step_grids(self.grid_quantum,
+                                                                    self.grid_classical,
+                                                                    self.rule, self.backend, self.boundary)
+                if self.fully_quantum:
+                    self.grid_fully_quantum = Grid(self.backend.dsqgol_step(self.grid_fully_quantum.grid, self.boundary))
+                self.generation += 1
+                self.remember()
+                if self.log is not None:
+                    self.log.write(measure(self.generation, self.grid_quantum.grid, self.grid_classical.grid,
+                                           previous_quantum.grid, previous_classical.grid,
+                                           self.fully_quantum_board()))
+                self.draw_boards()
+                self.publish()
 
-            else:
-                newgrid_quantum = self.grid_quantum
-                newgrid_classical = self.grid_classical
-                # newgrid_fully_quantum = grid_fully_quantum
+                self.final = pygame.time.get_ticks()
 
             self.debug.update()
 
-            # get mouse position
-            x = pygame.mouse.get_pos()[0] // PIXEL_SIZE
-            y = pygame.mouse.get_pos()[1] // PIXEL_SIZE
-
-            actionDown = False
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
-                    print('QUITTING')
-                    isActive = False
-                    pygame.quit()
-                    sys.exit()
-
-                elif event.type == pygame.MOUSEBUTTONDOWN and 0 <= x < X_LIMIT and 0 <= y < Y_LIMIT:
-                    actionDown = True
-
-                    while actionDown:
-                        x = pygame.mouse.get_pos()[0] // PIXEL_SIZE
-                        y = pygame.mouse.get_pos()[1] // PIXEL_SIZE
-
-                        if 0 <= x < X_LIMIT and 0 <= y < Y_LIMIT:
-                            if (newgrid_classical.getCell(x, y) == DEAD).all():
-                                newgrid_classical.setCell(x, y, ALIVE)
-                                newgrid_quantum.setCell(x, y, random_cell(self.sp_up_limit, self.sp_down_limit))
-                                # newgrid_fully_quantum.setCell(x, y, random_cell(sp_up_limit, sp_down_limit))
-
-                                drawSquareClassic(self.background_classical, x, y)
-                                drawSquare(self.background_quantum, x, y, newgrid_quantum.getCell(x, y))
-                                # drawSquare for fully quantum version left
-                            else:
-                                newgrid_classical.setCell(x, y, DEAD)
-                                newgrid_quantum.setCell(x, y, random_cell(self.sp_up_limit, self.sp_down_limit))
-                                # newgrid_fully_quantum.setCell(x, y, random_cell(sp_up_limit, sp_down_limit))
-
-                                drawSquareClassic(self.background_classical, x, y, DEAD)
-                                drawSquare(self.background_quantum, x, y, newgrid_quantum.getCell(x, y))
-                                # drawSquare for fully quantum version left
-
-                        for event in pygame.event.get():
-                            if event.type == pygame.MOUSEBUTTONUP:
-                                actionDown = False
-
-                        self.screen.blit(self.background_classical, (0, 0))
-                        self.screen.blit(self.background_quantum, (WIN_WIDTH + 100, 0))
-                        pygame.display.flip()
+                    self.quit()
+
+                elif event.type == pygame.KEYDOWN and event.key == pygame.K_BACKSPACE:
+                    self.rewind_simulation()
+
+                elif not self.handle_camera_event(event):
+                    self.handle_edit_event(event)
+
                 self.menu.react(event)  # the menu automatically integrate your elements
 
-            #Draws the new grid
-            self.grid_quantum = newgrid_quantum
-            self.grid_classical = newgrid_classical
-            # grid_fully_quantum = newgrid_fully_quantum
+            self.apply_edits()
 
             #Updates screen
             self.screen.blit(self.background_classical, (0, 0))
             # self.screen.blit(interspace, (WIN_WIDTH, 0))
             self.screen.blit(self.background_quantum, (WIN_WIDTH + WIN_INTERSPACE, 0))
             # self.screen.blit(interspace_horizontal, (0, WIN_HEIGHT))
-            # self.screen.blit(
-            #     background_fully_quantum,
-            #     (WIN_WIDTH / 2 + WIN_INTERSPACE / 2, WIN_HEIGHT + WIN_INTERSPACE))
+            if self.fully_quantum:
+                self.screen.blit(self.background_fully_quantum,
+                                 (WIN_WIDTH + WIN_INTERSPACE, WIN_HEIGHT + WIN_INTERSPACE))
             self.debug.update()
             self.debug.printText()
             pygame.display.flip()
 
 
-class Grid():
-    def __init__(self, *args, **kwargs):
-        self.grid = [[DEAD for i in range(Y_LIMIT)] for i in range(X_LIMIT)]
-
-    def setCell(self, x, y, stat):
-        self.grid[x][y] = stat
-
-    def getCell(self, x, y):
-        return self.grid[x][y]
-
-    def getNeighboursAround(self, x, y):
-        neighbors = []
-
-        for sub_x in range(3):
-            row = []
-
-            for sub_y in range(3):
-                actual_x = x - 1 + sub_x
-                if actual_x < 0:
-                    actual_x = X_LIMIT + actual_x
-                elif actual_x >= X_LIMIT:
-                    actual_x -= X_LIMIT
-
-                actual_y = y - 1 + sub_y
-                if actual_y < 0:
-                    actual_y = Y_LIMIT + actual_y
-                elif actual_y >= Y_LIMIT:
-                    actual_y -= Y_LIMIT
-
-                cell = self.getCell(actual_x, actual_y)
-
-                row.append(np.array(cell))
-
-            neighbors.append(np.array(row))
-
-        return neighbors
-
-    def countNeighbours(self, x, y):
-        neighbours = self.getNeighboursAround(x, y)
-        return liveliness(neighbours)
-
-        count = 0
-        for x in range(3):
-            for y in range(3):
-                if x == 1 and y == 1:
-                    continue
-                count += 1 if (neighbours[x][y] == np.array([0., 1.
-                                                             ])).all() else 0
-
-        return count
-
-
 class debugText():
     def __init__(self, screen, clock, *args, **kwargs):
         self.screen = screen
@@ -391,84 +471,6 @@ class debugText():
         self.clock = kwargs.get("clock", self.clock)
 
 
-# Initialize the grids randomly
-def init_grid_random(sp_up_limit, sp_down_limit, grid, background, grid2,
-                     background2, grid_fully_quantum,
-                     background_fully_quantum):
-    for x in range(X_LIMIT):
-        for y in range(Y_LIMIT):
-            cell = random_cell(sp_up_limit, sp_down_limit)
-            grid.setCell(x, y, cell)
-            drawSquare(background, x, y, cell)
-
-            # grid_fully_quantum.setCell(x, y, cell)
-            # drawSquare(background_fully_quantum, x, y, cell)
-
-            if cell[1] >= 0.5:
-                grid2.setCell(x, y, DEAD)
-                drawSquareClassic(background2, x, y)
-            else:
-                grid2.setCell(x, y, ALIVE)
-                drawSquareClassic(background2, x, y)
-
-
-# Initialize the grids from a json prespecification
-def init_grid_file(file_path, grid, background, grid2, background2,
-                   grid_fully_quantum, background_fully_quantum):
-    with open(file_path) as json_file:
-        data = json.load(json_file)
-
-        row_inc = len(data) // 2
-        column_inc = len(data[0]) // 2
-
-        grid_x_inc = X_LIMIT // 2
-        grid_y_inc = Y_LIMIT // 2
-
-        for r, row in enumerate(data):
-            for c, elem in enumerate(row):
-                cell = json_cell(elem)
-                final_x = grid_x_inc - column_inc + c
-                final_y = grid_y_inc - row_inc + r
-
-                grid.setCell(final_x, final_y, cell)
-                drawSquare(background, final_x, final_y, cell)
-
-                if cell[1] >= 0.5:
-                    grid2.setCell(final_x, final_y, DEAD)
-                    # drawSquareClassic(background2, final_x, final_y)
-                    print(f'{c}, {r} -> {cell[0]}, {cell[1]} -> {final_x}, {final_y}, DEAD')
-                else:
-                    grid2.setCell(final_x, final_y, ALIVE)
-                    drawSquareClassic(background2, final_x, final_y)
-                    print(f'{c}, {r} -> {cell[0]}, {cell[1]} -> {final_x}, {final_y}, ALIVE')
-
-def json_cell(a):
-    b = math.sqrt(1 - a**2)
-    return np.array([a, b])
-
-
-def random_cell(up_limit, down_limit):
-    a = random.random()
-    b = math.sqrt(1 - a**2)
-    if b >= up_limit:
-        b = 1.
-        a = 0.
-    elif b <= down_limit:
-        b = 0.
-        a = 1.
-
-    return np.array([a, b])
-
-
-def drawSquare(background, x, y, array):
-    #Cell colour
-    value = 255.0 - np.floor((array[1]**2) * 255)
-    colour = value, value, value
-    pygame.draw.rect(background, colour,
-                     (x * PIXEL_SIZE, y * PIXEL_SIZE, PIXEL_SIZE, PIXEL_SIZE),
-                     LINE_WIDTH)
-
-
 def drawBlankSpace(background, x, y):
     #Random cell colour
     colour = 40, 40, 40
@@ -476,16 +478,6 @@ def drawBlankSpace(background, x, y):
                      (x * PIXEL_SIZE, y * PIXEL_SIZE, PIXEL_SIZE, PIXEL_SIZE))
 
 
-def drawSquareClassic(background, x, y, state=ALIVE):
-    if (state==ALIVE).all():
-        colour = 255, 255, 255
-    else:
-        colour = 0, 0, 0
-    pygame.draw.rect(background, colour,
-                     (x * PIXEL_SIZE, y * PIXEL_SIZE, PIXEL_SIZE, PIXEL_SIZE),
-                     LINE_WIDTH)
-
-
 def addLabel(txt, pos, screen):
     textcolor = (255, 255, 255)
     smallfont = pygame.font.SysFont('Corbel', 35)
@@ -496,15 +488,15 @@ def addLabel(txt, pos, screen):
     screen.blit(info_text, (x,y))
     return
 
-def startgui(args):
+def startgui(args, stream=None, log=None, backend=None):
     pygame.init()
     res = (720, 720)
     screen = pygame.display.set_mode(res)
     color = (255, 255, 255)
     color_light = (170, 170, 170)
     color_dark = (100, 100, 100)
-    width = self.screen.get_width()
-    height = self.screen.get_height()
+    width = screen.get_width()
+    height = screen.get_height()
     smallfont = pygame.font.SysFont('Corbel', 35)
 
     button_height = 40
@@ -605,11 +597,28 @@ def startgui(args):
         pygame.display.update()
 
         if game_start:
-            main(args[SUPERPOSITION_UP_LIMIT_ARG],
-                 args[SUPERPOSITION_DOWN_LIMIT_ARG], args[FILE_ARG], args['refresh_rate'])
-
-def main(sp_up_limit=SUPERPOSITION_UP_LIMIT_VAL, sp_down_limit=SUPERPOSITION_DOWN_LIMIT_VAL, file_path=None, refresh_rate=REFRESH_DEFAULT):
-    game_state = GameState(sp_up_limit, sp_down_limit, file_path, refresh_rate)
+            main_with_args(args, stream, log, backend)
+
+# Runs the game with the parsed command line arguments
+def main_with_args(args, stream=None, log=None, backend=None):
+    main(args[SUPERPOSITION_UP_LIMIT_ARG],
+         args[SUPERPOSITION_DOWN_LIMIT_ARG], args[FILE_ARG], args['refresh_rate'],
+         LifeRule.parse(args[RULE_ARG]), args[SEED_ARG], args[BOARD_SIZE_ARG],
+         args[BRUSH_ARG], stream, log, args[FULLY_QUANTUM_ARG], backend,
+         int(args[HISTORY_ARG] * 2**20), args[BOUNDARY_ARG])
+
+# 'HOST:PORT' or just 'PORT' (on localhost)
+def address(text):
+    host, _, port = text.rpartition(':')
+    return host or '127.0.0.1', int(port)
+
+def board_size(text):
+    width, height = text.lower().split('x')
+    return int(width), int(height)
+
+def main(sp_up_limit=SUPERPOSITION_UP_LIMIT_VAL, sp_down_limit=SUPERPOSITION_DOWN_LIMIT_VAL, file_path=None, refresh_rate=REFRESH_DEFAULT, rule=CONWAY, seed=None, board_shape=(X_LIMIT, Y_LIMIT), brush_radius=0, stream=None, log=None, fully_quantum=False, backend=None, history_bytes=DEFAULT_MAX_BYTES, boundary=DEFAULT_BOUNDARY):
+    pygame.init()
+    game_state = GameState(sp_up_limit, sp_down_limit, file_path, refresh_rate, rule, seed, board_shape, brush_radius, stream, log, fully_quantum, backend, history_bytes, boundary)
     game_state.setup()
 
 # Code starts here.
@@ -622,6 +631,15 @@ if __name__ == "__main__":
     # parse arguments
     parser = argparse.ArgumentParser(description='Quantum Game of Life')
     parser.add_argument('--no-gui', action='store_true', help='Start simulation directly without loading GUI.')
+    parser.add_argument('--headless', action='store_true', help='Run without any window, see --generations, --frames and --video.')
+    parser.add_argument('--generations', type=int, default=100, help='Generations to run in headless mode (default: 100)')
+    parser.add_argument('--frames', default=None, help='Headless mode: directory to write one PNG per generation to')
+    parser.add_argument('--video', default=None, help='Headless mode: video file to encode the generations to with ffmpeg')
+    parser.add_argument('--frame-pixels', type=int, default=PIXEL_SIZE,
+                        help='Headless mode: pixels per cell in exported frames (default: {})'.format(PIXEL_SIZE))
+    parser.add_argument('--ensemble', type=int, default=0,
+                        help='Headless mode: measure the quantum board this many times and report statistics '
+                             'of the measured boards against SQGOL (default: 0, off)')
     parser.add_argument('--{}'.format(SUPERPOSITION_UP_LIMIT_ARG),
                         type=float,
                         default=SUPERPOSITION_UP_LIMIT_VAL,
@@ -639,12 +657,75 @@ if __name__ == "__main__":
                         type=float,
                         help='Refresh rate in ms (default: {})'.format(REFRESH_DEFAULT),
                         default=REFRESH_DEFAULT)
+    parser.add_argument('--{}'.format(RULE_ARG),
+                        help='Life-like rule in B/S notation (default: {})'.format(CONWAY),
+                        default=str(CONWAY))
+    parser.add_argument('--{}'.format(SEED_ARG),
+                        type=int,
+                        help='Seed for the random board and new quantum cells (default: random)',
+                        default=None)
+    parser.add_argument('--board-size',
+                        type=board_size,
+                        help='Board size in cells, as WIDTHxHEIGHT (default: {}x{})'.format(X_LIMIT, Y_LIMIT),
+                        default=(X_LIMIT, Y_LIMIT))
+    parser.add_argument('--{}'.format(BRUSH_ARG),
+                        type=int,
+                        help='Radius in cells of the brush used to draw cells (default: 0, a single cell)',
+                        default=0)
+    parser.add_argument('--{}'.format(SERVE_ARG),
+                        type=address,
+                        help='Stream the boards to browsers from HOST:PORT, e.g. 127.0.0.1:8765 or 0.0.0.0:8765 for the LAN (default: off)',
+                        default=None)
+    parser.add_argument('--{}'.format(LOG_ARG),
+                        help='Write per generation observables to this .csv (or .parquet, needs pyarrow) file (default: off)',
+                        default=None)
+    parser.add_argument('--fully-quantum',
+                        action='store_true',
+                        help='Also run the fully quantum (DSQGOL) board, every cell a density matrix')
+    parser.add_argument('--{}'.format(BACKEND_ARG),
+                        choices=list(BACKENDS),
+                        help='Engine backend; numba needs the numba package, the default is used if it is missing (default: {})'.format(DEFAULT_BACKEND),
+                        default=DEFAULT_BACKEND)
+    parser.add_argument('--{}'.format(WORKERS_ARG),
+                        type=int,
+                        help='Threads the backend splits the rows of the boards across (default: one per CPU)',
+                        default=None)
+    parser.add_argument('--{}'.format(UNBOUNDED_ARG),
+                        action='store_true',
+                        help='Headless mode: boards without edges, grown in chunks where cells are alive; '
+                             '--board-size is then the exported window')
+    parser.add_argument('--{}'.format(BOUNDARY_ARG),
+                        choices=BOUNDARIES,
+                        help='What lies past the edges of the boards: the opposite edge (torus), dead cells, '
+                             'or the board mirrored (reflect) (default: {})'.format(DEFAULT_BOUNDARY),
+                        default=DEFAULT_BOUNDARY)
+    parser.add_argument('--history-mb',
+                        type=float,
+                        help='Memory kept for stepping back, in MB (default: {})'.format(DEFAULT_MAX_BYTES // 2**20),
+                        default=DEFAULT_MAX_BYTES / 2**20)
     args = vars(parser.parse_args())
 
-    if True: #args['no_gui']:
+    log = None
+    if args[LOG_ARG] is not None:
+        log = ColumnLog(args[LOG_ARG])
+
+    stream = None
+    if args[SERVE_ARG] is not None:
+        stream = BoardStream(*args[SERVE_ARG]).start()
+        print(f'Streaming to {stream.url}')
+
+    backend = get_backend(args[BACKEND_ARG], args[WORKERS_ARG])
+
+    if args['headless']:
+        run_headless(args['generations'], args[SUPERPOSITION_UP_LIMIT_ARG],
+                     args[SUPERPOSITION_DOWN_LIMIT_ARG], args[FILE_ARG],
+                     LifeRule.parse(args[RULE_ARG]), args[SEED_ARG],
+                     args['frames'], args['video'], args['frame_pixels'],
+                     args[BOARD_SIZE_ARG], stream, args['ensemble'], log,
+                     args[FULLY_QUANTUM_ARG], backend, args[UNBOUNDED_ARG], args[BOUNDARY_ARG])
+    elif True: #args['no_gui']:
         # start simulation directly
-        main(args[SUPERPOSITION_UP_LIMIT_ARG],
-             args[SUPERPOSITION_DOWN_LIMIT_ARG], args[FILE_ARG], args['refresh_rate'])
+        main_with_args(args, stream, log, backend)
     else:
         # start GUI
-        startgui(args)
+        startgui(args, stream, log, backend)
@@ -0,0 +1,11 @@
+# Qonway's Game of Life engine: grids, rules, stepping backends and
+# headless runs, importable without pygame, thorpy or qiskit (qiskit is only
+# imported by qrules.init_quantum, numba only by the numba backend).
+# Browser streaming lives in qgol.stream and the GUI camera in qgol.viewport.
+
+from .backends import BACKENDS, available_backends, get_backend
+from .grid import (ALIVE, BOARD_SHAPE, DEAD, Grid, init_grid_file, init_grid_random,
+                   random_cells, step_grids)
+from .headless import run_headless
+from .liferule import CONWAY, LifeRule
+from .qrules import DSQGOL, SQGOL, liveliness
@@ -0,0 +1,257 @@
+import importlib.util
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from . import dmkernel
+from . import kernels
+from .liferule import SQRT2_PLUS_1
+from .neighbours import DEFAULT_BOUNDARY, ghost_indices, neighbourhood
+from .qrules import liveliness
+
+# Stepping backends for the three 2D engines. Every backend offers
+# classical_step(board, rule, boundary), sqgol_step(board, rule, boundary)
+# and dsqgol_step(rho, boundary) on whole boards, with the same semantics as
+# the kernels in kernels.py and dmkernel.py, and is picked by name with
+# get_backend(). boundary is one of neighbours.BOUNDARIES. The *_stack
+# versions step a (K, X, Y, ...) stack of separate boards wrapping around
+# their own edges, such as the chunks of an unbounded board (see sparse.py).
+
+
+# Runs kernel on horizontal bands of board (split along x) in a thread pool.
+# Every band gets one extra row from each of its neighbours, or from past
+# the edge as boundary says (dead rows being filled with dead), so kernel
+# computes its rows as on the whole board.
+def in_bands(pool, workers, kernel, board, boundary=DEFAULT_BOUNDARY, dead=0):
+    rows = board.shape[0]
+    if workers <= 1 or rows < 2 * workers:
+        return kernel(board)
+
+    bounds = np.linspace(0, rows, workers + 1).astype(int)
+    index = ghost_indices(rows, boundary)
+
+    def band(lo, hi):
+        padded = np.take(board, index[lo:hi + 2], axis=0)
+        padded[index[lo:hi + 2] < 0] = dead
+        return kernel(padded)[1:-1]
+
+    return np.concatenate(list(pool.map(band, bounds[:-1], bounds[1:])))
+
+
+# Runs kernel on slices of a stack of boards (split along the first axis) in
+# a thread pool
+def in_batches(pool, workers, kernel, stack):
+    if workers <= 1 or len(stack) < 2 * workers:
+        return kernel(stack)
+
+    bounds = np.linspace(0, len(stack), workers + 1).astype(int)
+    return np.concatenate(list(pool.map(lambda lo, hi: kernel(stack[lo:hi]), bounds[:-1], bounds[1:])))
+
+
+# Stack steps for backends that step one board at a time
+class BoardByBoard:
+    def classical_step_stack(self, stack, rule):
+        return np.stack([self.classical_step(board, rule) for board in stack])
+
+    def sqgol_step_stack(self, stack, rule):
+        return np.stack([self.sqgol_step(board, rule) for board in stack])
+
+    def dsqgol_step_stack(self, stack):
+        return np.stack([self.dsqgol_step(rho) for rho in stack])
+
+
+# The per-cell loops the engines started with: every cell reads its 3x3
+# neighbourhood and goes through the rule on its own. Slow, but the
+# semantics every other backend is checked against. Pure Python holds the
+# GIL, so this one runs serially.
+class ReferenceBackend(BoardByBoard):
+    name = 'reference'
+
+    def __init__(self, workers=None):
+        self.workers = 1
+
+    @staticmethod
+    def available():
+        return True
+
+    def close(self):
+        pass
+
+    def classical_step(self, board, rule, boundary=DEFAULT_BOUNDARY):
+        X, Y = board.shape[:2]
+        out = np.empty(board.shape)
+        for x in range(X):
+            for y in range(Y):
+                nhood = neighbourhood(board, x, y, boundary, kernels.DEAD)
+                count = sum(nhood[1 + dx][1 + dy][0] == 1 for dx, dy in kernels.NEIGHBOUR_OFFSETS)
+                if rule.classical_table[int(board[x, y, 0] == 1), count]:
+                    out[x, y] = kernels.ALIVE
+                else:
+                    out[x, y] = kernels.DEAD
+
+        return out
+
+    # SQGOL, for any rule: between the nodes n and n + 1 around the
+    # liveliness a the cell becomes (sqrt(2) + 1) * (n + 1 - a) times what
+    # node n does to it plus (a - n) times what node n + 1 does
+    def sqgol_step(self, board, rule, boundary=DEFAULT_BOUNDARY):
+        X, Y = board.shape[:2]
+        out = np.empty(board.shape)
+        for x in range(X):
+            for y in range(Y):
+                a = liveliness(neighbourhood(board, x, y, boundary, kernels.DEAD))
+                value = board[x, y]
+                n = int(rule.segment(a))
+                outcomes = np.array([value, value[::-1], kernels.ALIVE, kernels.DEAD])
+                low = rule.nodes[n] @ outcomes
+                high = rule.nodes[n + 1] @ outcomes
+                value = SQRT2_PLUS_1 * (n + 1 - a) * low + (a - n) * high
+                out[x, y] = value / np.linalg.norm(value)
+
+        return out
+
+    # qrules.DSQGOL, with init_quantum's circuit run cell by cell through
+    # dmkernel._cloning_machine
+    def dsqgol_step(self, rho, boundary=DEFAULT_BOUNDARY):
+        X, Y = rho.shape[:2]
+        vectors = dmkernel.amplitudes(rho)
+        out = np.empty(rho.shape)
+        for x in range(X):
+            for y in range(Y):
+                nhood = neighbourhood(vectors, x, y, boundary, kernels.DEAD)
+                a = liveliness(nhood)
+                value = vectors[x, y]
+
+                if value[0] > 0.98:
+                    if 1.5 < a <= 2.5:
+                        cell = init_quantum(nhood)
+                    elif 2.5 < a <= 3.5:
+                        cell = dmkernel.ALIVE_DM
+                    else:
+                        cell = dmkernel.DEAD_DM
+                elif a < 0.02:
+                    cell = dmkernel.DEAD_DM
+                else:
+                    if a < 1:
+                        cell = dmkernel.DEAD_DM
+                    elif a > 1 and a <= 1.5:
+                        cell = dmkernel.DEAD_DM
+                    elif a > 1.5 and a <= 3.5:
+                        cell = init_quantum(nhood)
+                    elif a > 3.5:
+                        cell = dmkernel.DEAD_DM
+                    else:
+                        cell = rho[x, y]
+                out[x, y] = cell
+
+        return out
+
+
+# The vectorized numpy kernels, on bands of rows in a pool of threads
+# (numpy releases the GIL inside its loops)
+class NumpyBackend:
+    name = 'numpy'
+
+    def __init__(self, workers=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.pool = ThreadPoolExecutor(self.workers) if self.workers > 1 else None
+
+    @staticmethod
+    def available():
+        return True
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown()
+
+    def classical_step(self, board, rule, boundary=DEFAULT_BOUNDARY):
+        return in_bands(self.pool, self.workers, lambda b: kernels.classical_step(b, rule, boundary),
+                        board, boundary, kernels.DEAD)
+
+    def sqgol_step(self, board, rule, boundary=DEFAULT_BOUNDARY):
+        return in_bands(self.pool, self.workers, lambda b: kernels.sqgol_step(b, rule, boundary),
+                        board, boundary, kernels.DEAD)
+
+    def dsqgol_step(self, rho, boundary=DEFAULT_BOUNDARY):
+        return in_bands(self.pool, self.workers, lambda b: dmkernel.dsqgol_step(b, boundary),
+                        rho, boundary, dmkernel.DEAD_DM)
+
+    def classical_step_stack(self, stack, rule):
+        return in_batches(self.pool, self.workers, lambda s: kernels.classical_step(s, rule), stack)
+
+    def sqgol_step_stack(self, stack, rule):
+        return in_batches(self.pool, self.workers, lambda s: kernels.sqgol_step(s, rule), stack)
+
+    def dsqgol_step_stack(self, stack):
+        return in_batches(self.pool, self.workers, dmkernel.dsqgol_step, stack)
+
+
+# Compiled per-cell loops (jitkernels.py), only if numba is installed.
+# Rows are spread over numba's threads. numba is only imported (and the
+# loops compiled) when the backend is created.
+class NumbaBackend(BoardByBoard):
+    name = 'numba'
+
+    def __init__(self, workers=None):
+        import numba
+
+        from . import jitkernels
+
+        self.jitkernels = jitkernels
+        self.workers = workers or numba.config.NUMBA_NUM_THREADS
+        numba.set_num_threads(min(self.workers, numba.config.NUMBA_NUM_THREADS))
+
+    @staticmethod
+    def available():
+        return importlib.util.find_spec('numba') is not None
+
+    def close(self):
+        pass
+
+    def classical_step(self, board, rule, boundary=DEFAULT_BOUNDARY):
+        return self.jitkernels.classical_step(np.ascontiguousarray(board, dtype=float), rule.classical_table,
+                                              *ghosts(board, boundary))
+
+    def sqgol_step(self, board, rule, boundary=DEFAULT_BOUNDARY):
+        return self.jitkernels.sqgol_step(np.ascontiguousarray(board, dtype=float), rule.sqgol_table,
+                                          *ghosts(board, boundary))
+
+    def dsqgol_step(self, rho, boundary=DEFAULT_BOUNDARY):
+        return self.jitkernels.dsqgol_step(np.ascontiguousarray(rho, dtype=float), dmkernel.CLONING_TABLE,
+                                           *ghosts(rho, boundary))
+
+
+BACKENDS = {backend.name: backend for backend in (ReferenceBackend, NumpyBackend, NumbaBackend)}
+DEFAULT_BACKEND = NumpyBackend.name
+
+
+# Rows and columns around the board for the compiled loops, see
+# neighbours.ghost_indices
+def ghosts(board, boundary):
+    return ghost_indices(board.shape[0], boundary), ghost_indices(board.shape[1], boundary)
+
+
+# The density matrix qrules.init_quantum computes for a neighbourhood
+def init_quantum(nhood):
+    mean = sum(nhood[i][j] for i in range(3) for j in range(3) if (i, j) != (1, 1)) / 8
+    mean = mean / np.linalg.norm(mean)
+    state = np.outer(mean, mean)
+    return dmkernel._cloning_machine(state, state)
+
+
+def available_backends():
+    return [name for name, backend in BACKENDS.items() if backend.available()]
+
+
+# Backend called name, or the default one (with a message) if it needs a
+# package that is not installed
+def get_backend(name=DEFAULT_BACKEND, workers=None):
+    if name not in BACKENDS:
+        raise ValueError(f'Unknown backend: {name} (choose from {", ".join(BACKENDS)})')
+
+    if not BACKENDS[name].available():
+        print(f'Backend {name} is not available, using {DEFAULT_BACKEND}')
+        name = DEFAULT_BACKEND
+
+    return BACKENDS[name](workers)
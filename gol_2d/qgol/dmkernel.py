@@ -0,0 +1,106 @@
+import numpy as np
+
+from .kernels import DEAD
+from .neighbours import DEFAULT_BOUNDARY, neighbour_sum
+
+# Fully quantum board: every cell is a 2x2 real density matrix in the
+# [alive, dead] basis, the whole board being one (X, Y, 2, 2) array.
+
+ALIVE_DM = np.array([[1.0, 0.0], [0.0, 0.0]])
+DEAD_DM = np.array([[0.0, 0.0], [0.0, 1.0]])
+
+
+# Density matrices of pure cells given as [alive, dead] amplitudes
+def pure_density(board):
+    return np.einsum('...i,...j->...ij', board, board)
+
+
+# [alive, dead] amplitudes matching the diagonal of each density matrix
+def amplitudes(rho):
+    return np.sqrt(np.clip(np.diagonal(rho, axis1=-2, axis2=-1), 0, None))
+
+
+def _cx(rho, control, target):
+    # 3-qubit density matrices as (q2, q1, q0, q2', q1', q0') tensors
+    index = np.arange(8).reshape(2, 2, 2)
+    flipped = index.copy()
+    axes = [2 - control, 2 - target]
+    moved = np.moveaxis(flipped, axes, [0, 1])
+    moved[1] = moved[1, ::-1].copy()
+    perm = flipped.ravel()
+    return rho[np.ix_(perm, perm)]
+
+
+# Output of the cloning machine of qrules.init_quantum for the first and
+# second preparation of qubit 0 in states first and second (density
+# matrices), as the reduced density matrix of qubit 0. Qubit 0 is the least
+# significant bit of the 3-qubit index, as in qiskit.
+def _cloning_machine(first, second):
+    pair = np.array([2, 1, 0, 1]) / np.sqrt(6)  # on qubits 1 and 2
+    pair_dm = np.outer(pair, pair).reshape(2, 2, 2, 2)  # (q2, q1, q2', q1')
+    rho = np.einsum('abcd,ef->abecdf', pair_dm, first).reshape(8, 8)
+    rho = _cx(rho, 0, 1)
+
+    # initialize() on qubit 0 again: reset it and prepare the second state
+    rest = np.einsum('abcdec->abde', rho.reshape(2, 2, 2, 2, 2, 2))
+    rho = np.einsum('abcd,ef->abecdf', rest, second).reshape(8, 8)
+
+    for control, target in ((0, 1), (0, 2), (1, 0), (2, 0)):
+        rho = _cx(rho, control, target)
+
+    return np.einsum('abcabd->cd', rho.reshape(2, 2, 2, 2, 2, 2))
+
+
+# The machine is linear in each of its two inputs, so it is tabulated once
+# as a (4, 16) matrix from vec(first) x vec(second) to vec(output)
+def _cloning_table():
+    basis = np.eye(4).reshape(4, 2, 2)
+    table = np.empty((4, 4, 4))
+    for k, first in enumerate(basis):
+        for m, second in enumerate(basis):
+            table[:, k, m] = _cloning_machine(first, second).ravel()
+    return table.reshape(4, 16)
+
+
+CLONING_TABLE = _cloning_table()
+
+
+# Batched cloning machine: (..., 2) normalized amplitude vectors to the
+# (..., 2, 2) density matrices init_quantum computes for them one by one
+def clone(vectors):
+    rho = pure_density(vectors).reshape(vectors.shape[:-1] + (4,))
+    pairs = np.einsum('...k,...m->...km', rho, rho).reshape(vectors.shape[:-1] + (16,))
+    return (pairs @ CLONING_TABLE.T).reshape(vectors.shape[:-1] + (2, 2))
+
+
+# One generation of DSQGOL for the whole board. Cells enter liveliness and
+# the cloning machine through their amplitudes, as the per-cell version
+# receives them, and DSQGOL's branches become masks. Past the edges, cells
+# are read as boundary says (see neighbours.py).
+def dsqgol_step(rho, boundary=DEFAULT_BOUNDARY):
+    vectors = amplitudes(rho)
+    a = neighbour_sum(vectors[..., 0], boundary)
+    value = vectors[..., 0]
+
+    mean = neighbour_sum(vectors, boundary, DEAD, cell_ndim=1) / 8
+    mean /= np.linalg.norm(mean, axis=-1, keepdims=True)
+    cloned = clone(np.nan_to_num(mean))
+
+    alive_cell = value > 0.98
+    dim_neighbourhood = ~alive_cell & (a < 0.02)
+    other = ~alive_cell & ~dim_neighbourhood
+    to_clone = (a > 1.5) & (a <= 2.5)
+    to_alive = (a > 2.5) & (a <= 3.5)
+
+    conditions = [
+        alive_cell & to_clone,
+        alive_cell & to_alive,
+        alive_cell,
+        dim_neighbourhood,
+        other & (to_clone | to_alive),
+        other & (a == 1),
+    ]
+    choices = [cloned, ALIVE_DM, DEAD_DM, DEAD_DM, cloned, rho]
+    conditions = [c[..., np.newaxis, np.newaxis] for c in conditions]
+
+    return np.select(conditions, choices, default=DEAD_DM)
@@ -0,0 +1,98 @@
+import numpy as np
+
+from .dmkernel import pure_density
+from .kernels import ALIVE, DEAD
+from .neighbours import DEFAULT_BOUNDARY, board_cells
+
+
+# Offsets of the cells covered by a round brush of the given radius
+def brush_offsets(radius):
+    span = np.arange(-radius, radius + 1)
+    dx, dy = np.meshgrid(span, span, indexing='ij')
+    inside = dx**2 + dy**2 <= radius**2 + radius
+    return np.stack([dx[inside], dy[inside]], axis=1)
+
+
+# Mouse edits waiting to be written to the boards. A stroke starts on a cell
+# and paints every cell the brush goes over alive, or dead if the first cell
+# was alive. Strokes are given in view cells (Camera.screen_to_view_cell),
+# which only wrap around the board once the line is drawn. Writes are only
+# queued while the mouse moves and are applied all at once by apply(),
+# between two generations. The brush wraps around
+# or is mirrored at the edges like the neighbourhoods of the boundary (see
+# neighbours.py), and is cut at dead edges.
+class EditQueue:
+    def __init__(self, board_shape, brush_radius=0, boundary=DEFAULT_BOUNDARY):
+        self.board_shape = tuple(board_shape)
+        self.boundary = boundary
+        self.brush_radius = brush_radius
+        self.stroke_alive = None
+        self.last_cell = None
+        self.pending = []
+
+    @property
+    def brush_radius(self):
+        return self._brush_radius
+
+    @brush_radius.setter
+    def brush_radius(self, radius):
+        self._brush_radius = max(0, radius)
+        self._offsets = brush_offsets(self._brush_radius)
+
+    @property
+    def painting(self):
+        return self.stroke_alive is not None
+
+    def begin_stroke(self, cell, grid_classical):
+        x, y = cell[0] % self.board_shape[0], cell[1] % self.board_shape[1]
+        self.stroke_alive = not (grid_classical.getCell(x, y) == ALIVE).all()
+        self.last_cell = None
+        self.paint(cell)
+
+    # Queues the brush footprint along the line from the previous position,
+    # so fast mouse moves do not leave gaps
+    def paint(self, cell):
+        if not self.painting:
+            return
+
+        start = cell if self.last_cell is None else self.last_cell
+        steps = max(abs(cell[0] - start[0]), abs(cell[1] - start[1])) + 1
+        line = np.rint(np.linspace(start, cell, steps)).astype(np.intp) % self.board_shape
+        cells, inside = board_cells((line[:, np.newaxis, :] + self._offsets).reshape(-1, 2),
+                                    self.board_shape, self.boundary)
+        self.pending.append((cells[inside], self.stroke_alive))
+        self.last_cell = cell
+
+    # Breaks the line of the stroke, e.g. when the mouse leaves the view or
+    # the view moves, so the next position does not connect to the last one
+    def lift(self):
+        self.last_cell = None
+
+    def end_stroke(self):
+        self.stroke_alive = None
+        self.last_cell = None
+
+    # Writes all queued edits. Edited cells become ALIVE or DEAD on the
+    # classical board and get fresh cells from new_quantum_cells(count) on the
+    # quantum board, which the fully quantum board copies if given.
+    # Returns True if anything was written.
+    def apply(self, grid_quantum, grid_classical, new_quantum_cells, grid_fully_quantum=None):
+        if not self.pending:
+            return False
+
+        cells = np.concatenate([c for c, _ in self.pending])
+        alive = np.concatenate([np.full(len(c), a) for c, a in self.pending])
+        self.pending = []
+
+        # keep only the last write to each cell
+        flat = np.ravel_multi_index(cells.T, self.board_shape)[::-1]
+        _, last = np.unique(flat, return_index=True)
+        cells = cells[::-1][last]
+        alive = alive[::-1][last]
+
+        xs, ys = cells.T
+        grid_classical.grid[xs, ys] = np.where(alive[:, np.newaxis], ALIVE, DEAD)
+        grid_quantum.grid[xs, ys] = new_quantum_cells(len(cells))
+        if grid_fully_quantum is not None:
+            grid_fully_quantum.grid[xs, ys] = pure_density(grid_quantum.grid[xs, ys])
+        return True
@@ -0,0 +1,59 @@
+import numpy as np
+
+from .kernels import classical_step_alive, sqgol_step
+from .neighbours import DEFAULT_BOUNDARY
+
+
+# Monte Carlo ensemble of measurements of a quantum board: each of the
+# `size` classical boards is drawn by measuring every cell, alive with
+# probability |alive amplitude|^2. All boards are stacked in one (size, X, Y)
+# array and advanced together with the classical rule, next to the SQGOL
+# evolution of the quantum board they came from. Callers that already step
+# the quantum board pass it to step() instead of having it stepped twice.
+class Ensemble:
+    def __init__(self, board, size, rule, rng, boundary=DEFAULT_BOUNDARY):
+        self.rule = rule
+        self.boundary = boundary
+        self.quantum = board
+        self.boards = rng.random((size,) + board.shape[:2]) < board[..., 0]**2
+        self.generation = 0
+
+    @property
+    def size(self):
+        return self.boards.shape[0]
+
+    # One generation of the measured boards; quantum is the quantum board of
+    # the new generation, stepped here if not given
+    def step(self, quantum=None):
+        self.boards = classical_step_alive(self.boards, self.rule, self.boundary)
+        if quantum is None:
+            quantum = sqgol_step(self.quantum, self.rule, self.boundary)
+        self.quantum = quantum
+        self.generation += 1
+
+    # Aggregates over the ensemble: population of each board, how often
+    # each cell is alive, and how far that is from the probability of being
+    # alive predicted by SQGOL (mean and largest absolute difference)
+    def statistics(self):
+        populations = self.boards.sum(axis=(1, 2))
+        frequency = self.boards.mean(axis=0)
+        predicted = self.quantum[..., 0]**2
+        difference = np.abs(frequency - predicted)
+
+        return {
+            'generation': self.generation,
+            'mean_population': populations.mean(),
+            'std_population': populations.std(),
+            'predicted_population': predicted.sum(),
+            'mean_divergence': difference.mean(),
+            'max_divergence': difference.max(),
+            'frequency': frequency,
+        }
+
+    # Yields the statistics of the current generation and of each of the
+    # next `generations`
+    def run(self, generations):
+        yield self.statistics()
+        for _ in range(generations):
+            self.step()
+            yield self.statistics()
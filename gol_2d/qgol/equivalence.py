@@ -0,0 +1,218 @@
+import argparse
+import glob
+import os
+
+import numpy as np
+
+from . import kernels
+from .backends import available_backends, get_backend
+from .grid import (ALIVE, BOARD_SHAPE, DEAD, SUPERPOSITION_DOWN_LIMIT, SUPERPOSITION_UP_LIMIT, Grid,
+                   init_grid_file, init_grid_random)
+from .liferule import CONWAY
+from .neighbours import BOUNDARIES, DEFAULT_BOUNDARY, TORUS, REFLECT
+from .qrules import SQGOL, liveliness
+
+# Regression harness: every engine must step the semi-quantum and classical
+# boards exactly like the per-cell loop GameState.run started with, which is
+# kept here as the oracle.
+
+SEEDS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'seeds')
+
+# Largest difference allowed between an engine's quantum cells and the
+# oracle's (classical cells must be identical)
+TOLERANCE = 1e-12
+
+# Cells listed in a failure message
+DIFF_LIMIT = 20
+
+
+# Coordinate along an axis of limit cells of the neighbour at index, None
+# for a dead cell. The torus branches are the original Grid wraparound; this
+# copy is kept apart from neighbours.py on purpose, so the oracle does not
+# share the index tables of the engines it checks.
+def _wrap(index, limit, boundary):
+    if index < 0:
+        if boundary == TORUS:
+            return limit + index
+        if boundary == REFLECT:
+            return -index - 1
+        return None
+    if index >= limit:
+        if boundary == TORUS:
+            return index - limit
+        if boundary == REFLECT:
+            return 2 * limit - index - 1
+        return None
+    return index
+
+
+# 3x3 neighbourhood of cell (x, y), as the original getNeighboursAround
+# built it
+def reference_neighbours(board, x, y, boundary=DEFAULT_BOUNDARY):
+    X_LIMIT, Y_LIMIT = board.shape[:2]
+    neighbors = []
+
+    for sub_x in range(3):
+        row = []
+
+        for sub_y in range(3):
+            actual_x = _wrap(x - 1 + sub_x, X_LIMIT, boundary)
+            actual_y = _wrap(y - 1 + sub_y, Y_LIMIT, boundary)
+            if actual_x is None or actual_y is None:
+                cell = DEAD
+            else:
+                cell = board[actual_x][actual_y]
+
+            row.append(np.array(cell))
+
+        neighbors.append(np.array(row))
+
+    return neighbors
+
+
+# One generation exactly as the original GameState.run computed it: SQGOL on
+# the 3x3 neighbourhood of every quantum cell and Conway's rule on the
+# classical cells, counting live neighbours as countNeighbours did
+def reference_step(grid_quantum, grid_classical, boundary=DEFAULT_BOUNDARY):
+    X, Y = grid_quantum.grid.shape[:2]
+    newgrid_quantum = Grid(shape=(X, Y))
+    newgrid_classical = Grid(shape=(X, Y))
+
+    for x in range(0, X):
+        for y in range(0, Y):
+            subgrid = reference_neighbours(grid_quantum.grid, x, y, boundary)
+            newgrid_quantum.setCell(x, y, SQGOL(subgrid))
+            #Classic game of life
+            if (grid_classical.getCell(x, y) == ALIVE).all():
+                count = liveliness(reference_neighbours(grid_classical.grid, x, y, boundary))
+                if count < 2:
+                    newgrid_classical.setCell(x, y, DEAD)
+                elif count <= 3:
+                    newgrid_classical.setCell(x, y, ALIVE)
+                elif count >= 4:
+                    newgrid_classical.setCell(x, y, DEAD)
+            else:
+                if liveliness(reference_neighbours(grid_classical.grid, x, y, boundary)) == 3:
+                    newgrid_classical.setCell(x, y, ALIVE)
+
+    return newgrid_quantum, newgrid_classical
+
+
+# Runs several boards at once through the (..., X, Y, 2) kernels, the way
+# ensembles and sweeps use them: the board is stepped as the first of a
+# stack with a mirrored copy of itself
+class BatchedEngine:
+    name = 'batched'
+
+    def sqgol_step(self, board, rule, boundary=DEFAULT_BOUNDARY):
+        return kernels.sqgol_step(np.stack([board, board[::-1, ::-1]]), rule, boundary)[0]
+
+    def classical_step(self, board, rule, boundary=DEFAULT_BOUNDARY):
+        return kernels.classical_step(np.stack([board, board[::-1, ::-1]]), rule, boundary)[0]
+
+    def close(self):
+        pass
+
+
+# Engines checked against the oracle, by name: every available backend,
+# numpy also split into bands of rows, and the batched kernels
+def engines():
+    found = {name: get_backend(name, workers=1) for name in available_backends()}
+    found['numpy-bands'] = get_backend('numpy', workers=4)
+    found[BatchedEngine.name] = BatchedEngine()
+    return found
+
+
+def seed_files():
+    return sorted(glob.glob(os.path.join(SEEDS_DIR, '*.json')))
+
+
+# Quantum and classical grids loaded from a JSON seed
+def seed_grids(path, shape=BOARD_SHAPE):
+    grid_quantum, grid_classical = Grid(shape=shape), Grid(shape=shape)
+    init_grid_file(path, grid_quantum, grid_classical)
+    return grid_quantum, grid_classical
+
+
+def random_grids(seed, shape=BOARD_SHAPE, sp_up_limit=SUPERPOSITION_UP_LIMIT,
+                 sp_down_limit=SUPERPOSITION_DOWN_LIMIT):
+    grid_quantum, grid_classical = Grid(shape=shape), Grid(shape=shape)
+    init_grid_random(sp_up_limit, sp_down_limit, grid_quantum, grid_classical,
+                     np.random.default_rng(seed))
+    return grid_quantum, grid_classical
+
+
+# Cells where actual differs from expected by more than atol, as a
+# readable report of at most limit cells (worst first)
+def cell_diff(label, expected, actual, atol=TOLERANCE, limit=DIFF_LIMIT):
+    error = np.abs(np.asarray(actual, dtype=float) - expected).max(axis=-1)
+    error = np.where(np.isnan(error), np.inf, error)
+    cells = np.argwhere(error > atol)
+    if len(cells) == 0:
+        return None
+
+    worst = cells[np.argsort(-error[tuple(cells.T)], kind='stable')][:limit]
+    lines = [f'{label}: {len(cells)} cells differ (largest difference {error.max():.3g})']
+    for x, y in worst:
+        lines.append(f'  ({x}, {y}): expected {np.round(expected[x, y], 12).tolist()} '
+                     f'got {np.round(actual[x, y], 12).tolist()}')
+    if len(cells) > limit:
+        lines.append(f'  ... and {len(cells) - limit} more')
+    return '\n'.join(lines)
+
+
+# Steps the grids for generations with the oracle and with every engine
+# and raises AssertionError, with a per-cell diff, at the first generation
+# where an engine differs. Returns the oracle's last grids.
+def check(grid_quantum, grid_classical, generations, engines, label='board', atol=TOLERANCE,
+          boundary=DEFAULT_BOUNDARY):
+    boards = {name: (grid_quantum.grid, grid_classical.grid) for name in engines}
+    for generation in range(1, generations + 1):
+        grid_quantum, grid_classical = reference_step(grid_quantum, grid_classical, boundary)
+        for name, engine in engines.items():
+            quantum, classical = boards[name]
+            quantum = engine.sqgol_step(quantum, CONWAY, boundary)
+            classical = engine.classical_step(classical, CONWAY, boundary)
+            boards[name] = quantum, classical
+
+            where = f'{label}, {boundary} edges, engine {name}, generation {generation}'
+            diffs = [cell_diff(f'{where}, quantum board', grid_quantum.grid, quantum, atol),
+                     cell_diff(f'{where}, classical board', grid_classical.grid, classical, 0)]
+            diffs = [diff for diff in diffs if diff is not None]
+            if diffs:
+                raise AssertionError('\n'.join(diffs))
+
+    return grid_quantum, grid_classical
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check every engine against the original per-cell loop')
+    parser.add_argument('--generations', type=int, default=10, help='Generations per board (default: 10)')
+    parser.add_argument('--random', type=int, default=3, help='Random boards, seeded 0..N-1 (default: 3)')
+    parser.add_argument('--atol', type=float, default=TOLERANCE,
+                        help='Largest difference allowed on quantum cells (default: {})'.format(TOLERANCE))
+    parser.add_argument('--boundary', choices=BOUNDARIES, default=DEFAULT_BOUNDARY,
+                        help='What lies past the edges of the boards (default: {})'.format(DEFAULT_BOUNDARY))
+    args = parser.parse_args()
+
+    found = engines()
+    print('engines: ' + ', '.join(found))
+    boards = [(os.path.basename(path), seed_grids(path)) for path in seed_files()]
+    boards += [(f'random board {seed}', random_grids(seed)) for seed in range(args.random)]
+
+    failed = 0
+    for label, (grid_quantum, grid_classical) in boards:
+        try:
+            check(grid_quantum, grid_classical, args.generations, found, label, args.atol, args.boundary)
+            print(f'{label}: ok')
+        except AssertionError as error:
+            failed += 1
+            print(error)
+
+    for engine in found.values():
+        engine.close()
+    raise SystemExit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+import json
+import math
+
+import numpy as np
+
+from .neighbours import DEFAULT_BOUNDARY, neighbourhood
+from .qrules import liveliness
+
+# Default board: 60x40 cells, the size of the GUI views
+BOARD_SHAPE = (60, 40)
+
+ALIVE = np.array([1, 0])
+DEAD = np.array([0, 1])
+
+# Default superposition limits for random cells, see random_cells()
+SUPERPOSITION_UP_LIMIT = 0.51
+SUPERPOSITION_DOWN_LIMIT = 0.48
+
+
+class Grid():
+    def __init__(self, grid=None, shape=BOARD_SHAPE):
+        # (width, height, 2) array of [alive, dead] amplitudes
+        if grid is None:
+            grid = np.tile(DEAD.astype(float), tuple(shape) + (1,))
+        self.grid = grid
+
+    def setCell(self, x, y, stat):
+        self.grid[x][y] = stat
+
+    def getCell(self, x, y):
+        return self.grid[x][y]
+
+    # (3, 3, 2) neighbourhood of the cell, itself in the middle, read with
+    # the cached gather table of the board shape (see neighbours.py)
+    def getNeighboursAround(self, x, y, boundary=DEFAULT_BOUNDARY):
+        return neighbourhood(self.grid, x, y, boundary, DEAD)
+
+    def countNeighbours(self, x, y, boundary=DEFAULT_BOUNDARY):
+        neighbours = self.getNeighboursAround(x, y, boundary)
+        return liveliness(neighbours)
+
+
+# One generation of both boards
+def step_grids(grid_quantum, grid_classical, rule, backend, boundary=DEFAULT_BOUNDARY):
+    return (Grid(backend.sqgol_step(grid_quantum.grid, rule, boundary)),
+            Grid(backend.classical_step(grid_classical.grid, rule, boundary)))
+
+
+# Initialize the grids randomly, all cells at once
+def init_grid_random(sp_up_limit, sp_down_limit, grid, grid2, rng):
+    cells = random_cells(grid.grid.shape[:2], sp_up_limit, sp_down_limit, rng)
+    grid.grid = cells
+    grid2.grid = np.where(cells[..., 1:] >= 0.5, DEAD, ALIVE).astype(float)
+
+
+# Initialize the grids from a json prespecification
+def init_grid_file(file_path, grid, grid2):
+    with open(file_path) as json_file:
+        data = json.load(json_file)
+
+        row_inc = len(data) // 2
+        column_inc = len(data[0]) // 2
+
+        grid_x_inc = grid.grid.shape[0] // 2
+        grid_y_inc = grid.grid.shape[1] // 2
+
+        for r, row in enumerate(data):
+            for c, elem in enumerate(row):
+                cell = json_cell(elem)
+                final_x = grid_x_inc - column_inc + c
+                final_y = grid_y_inc - row_inc + r
+
+                grid.setCell(final_x, final_y, cell)
+                grid2.setCell(final_x, final_y, DEAD if cell[1] >= 0.5 else ALIVE)
+
+def json_cell(a):
+    b = math.sqrt(1 - a**2)
+    return np.array([a, b])
+
+
+def random_cell(up_limit, down_limit, rng):
+    return random_cells((), up_limit, down_limit, rng)
+
+
+# Array of random cells: the alive amplitude is uniform in [0, 1), then the
+# cell becomes DEAD if its dead amplitude is above up_limit and ALIVE if it
+# is below down_limit
+def random_cells(shape, up_limit, down_limit, rng):
+    a = rng.random(shape)
+    b = np.sqrt(1 - a**2)
+    dead = b >= up_limit
+    alive = ~dead & (b <= down_limit)
+    a = np.where(dead, 0., np.where(alive, 1., a))
+    b = np.where(dead, 1., np.where(alive, 0., b))
+
+    return np.stack([a, b], axis=-1)
@@ -0,0 +1,112 @@
+import numpy as np
+
+from . import sparse
+from .backends import get_backend
+from .dmkernel import DEAD_DM, amplitudes, pure_density
+from .ensemble import Ensemble
+from .grid import (BOARD_SHAPE, SUPERPOSITION_DOWN_LIMIT, SUPERPOSITION_UP_LIMIT, Grid,
+                   init_grid_file, init_grid_random, step_grids)
+from .liferule import CONWAY
+from .neighbours import DEFAULT_BOUNDARY, check_boundary
+from .observables import measure
+from .render import INTERSPACE, LINE_WIDTH, PIXEL_SIZE, PngSequenceWriter, VideoWriter, compose_frame
+
+
+# Runs the simulation without any window and optionally exports every
+# generation as a PNG file in frames_dir and/or as a video file, publishes
+# it to a BoardStream and/or writes its observables to a ColumnLog. With ensemble_size > 0 it also measures the
+# initial quantum board that many times, runs all the measured boards and
+# prints how they compare with the SQGOL prediction. With fully_quantum the
+# DSQGOL board runs too and is exported as a third panel. The boards are
+# stepped by backend (default: numpy), with boundary saying what lies past
+# their edges (see neighbours.py). With unbounded the boards have no edges
+# (see sparse.py) and board_shape is only the window that is exported,
+# streamed and logged.
+def run_headless(generations, sp_up_limit=SUPERPOSITION_UP_LIMIT,
+                 sp_down_limit=SUPERPOSITION_DOWN_LIMIT, file_path=None,
+                 rule=CONWAY, seed=None, frames_dir=None, video_path=None,
+                 pixel_size=PIXEL_SIZE, board_shape=BOARD_SHAPE, stream=None,
+                 ensemble_size=0, log=None, fully_quantum=False, backend=None,
+                 unbounded=False, boundary=DEFAULT_BOUNDARY):
+    check_boundary(boundary)
+    if unbounded and ensemble_size > 0:
+        raise ValueError('Ensembles need a bounded board')
+    if unbounded and boundary != DEFAULT_BOUNDARY:
+        raise ValueError('Unbounded boards have no edges, the boundary only applies to bounded ones')
+
+    backend = backend or get_backend()
+    grid_quantum = Grid(shape=board_shape)
+    grid_classical = Grid(shape=board_shape)
+    rng = np.random.default_rng(seed)
+    if file_path is None:
+        init_grid_random(sp_up_limit, sp_down_limit, grid_quantum, grid_classical, rng)
+    else:
+        init_grid_file(file_path, grid_quantum, grid_classical)
+
+    grid_fully_quantum = None
+    if fully_quantum:
+        grid_fully_quantum = Grid(pure_density(grid_quantum.grid))
+
+    step = lambda grid_quantum, grid_classical: step_grids(grid_quantum, grid_classical, rule, backend, boundary)
+    step_fully_quantum = lambda grid: Grid(backend.dsqgol_step(grid.grid, boundary))
+    view = lambda grid: grid.grid
+    if unbounded:
+        grid_quantum = sparse.SparseBoard.from_dense(grid_quantum.grid)
+        grid_classical = sparse.SparseBoard.from_dense(grid_classical.grid)
+        if fully_quantum:
+            grid_fully_quantum = sparse.SparseBoard.from_dense(grid_fully_quantum.grid, DEAD_DM)
+        step = lambda board_quantum, board_classical: (sparse.sqgol_step(board_quantum, rule, backend),
+                                                       sparse.classical_step(board_classical, rule, backend))
+        step_fully_quantum = lambda board: sparse.dsqgol_step(board, backend)
+        view = lambda board: board.window((0, 0), board_shape)
+
+    ensemble = None
+    if ensemble_size > 0:
+        ensemble = Ensemble(grid_quantum.grid, ensemble_size, rule, rng, boundary)
+
+    writers = []
+    if frames_dir is not None:
+        writers.append(PngSequenceWriter(frames_dir))
+    if video_path is not None:
+        writers.append(VideoWriter(video_path))
+
+    line_width = LINE_WIDTH * pixel_size // PIXEL_SIZE or None
+    try:
+        previous_quantum = previous_classical = None
+        quantum, classical = view(grid_quantum), view(grid_classical)
+        for generation in range(generations + 1):
+            if generation > 0:
+                previous_quantum, previous_classical = quantum, classical
+                grid_quantum, grid_classical = step(grid_quantum, grid_classical)
+                quantum, classical = view(grid_quantum), view(grid_classical)
+                if fully_quantum:
+                    grid_fully_quantum = step_fully_quantum(grid_fully_quantum)
+            if log is not None:
+                log.write(measure(generation, quantum, classical, previous_quantum, previous_classical,
+                                  None if grid_fully_quantum is None else view(grid_fully_quantum)))
+            if stream is not None:
+                stream.publish(generation, quantum, classical)
+            if ensemble is not None:
+                if generation > 0:
+                    ensemble.step(quantum)
+                print_ensemble_statistics(ensemble.statistics())
+            if writers:
+                third = None if grid_fully_quantum is None else amplitudes(view(grid_fully_quantum))
+                frame = compose_frame(classical, quantum, pixel_size,
+                                      line_width, INTERSPACE * pixel_size // PIXEL_SIZE, third)
+                for writer in writers:
+                    writer.submit(generation, frame)
+    finally:
+        for writer in writers:
+            writer.close()
+        if log is not None:
+            log.close()
+        backend.close()
+
+    return grid_quantum, grid_classical
+
+def print_ensemble_statistics(stats):
+    print('generation {}: population {:.1f} +/- {:.1f} (SQGOL {:.1f}), '
+          'divergence mean {:.4f} max {:.4f}'.format(
+              stats['generation'], stats['mean_population'], stats['std_population'],
+              stats['predicted_population'], stats['mean_divergence'], stats['max_divergence']))
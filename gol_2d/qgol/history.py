@@ -0,0 +1,135 @@
+import bisect
+from collections import deque
+
+import numpy as np
+
+# Bounded history of the boards, to step back to earlier generations.
+# Generations are stored in segments: a keyframe (full copies of the boards)
+# followed by deltas holding only the cells that changed since the previous
+# generation. Rebuilding a generation applies the deltas of its segment from
+# the keyframe on, so it costs at most KEYFRAME_INTERVAL deltas. When the
+# history grows past max_bytes, the oldest segments are dropped whole.
+
+KEYFRAME_INTERVAL = 32
+DEFAULT_MAX_BYTES = 64 * 2**20
+
+
+class Segment:
+    def __init__(self, generation, keyframe):
+        self.generation = generation
+        self.keyframe = keyframe
+        self.deltas = []
+        self.nbytes = sum(board.nbytes for board in keyframe)
+
+    @property
+    def last(self):
+        return self.generation + len(self.deltas)
+
+
+# Cells of new that differ from old, as (flat cell indices, new values) for
+# every board
+def delta(old, new):
+    changes = []
+    for before, after in zip(old, new):
+        cells = after.reshape(before.shape[0] * before.shape[1], -1)
+        changed = np.flatnonzero(np.any(cells != before.reshape(cells.shape), axis=-1))
+        changes.append((changed.astype(np.int32), cells[changed]))
+    return changes
+
+
+def apply_delta(boards, changes):
+    for board, (cells, values) in zip(boards, changes):
+        board.reshape(board.shape[0] * board.shape[1], -1)[cells] = values
+
+
+class History:
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, keyframe_interval=KEYFRAME_INTERVAL):
+        self.max_bytes = max_bytes
+        self.keyframe_interval = keyframe_interval
+        self.segments = deque()
+        self.nbytes = 0
+        self.last = None  # copies of the newest boards, to compute deltas
+
+    @property
+    def oldest(self):
+        return self.segments[0].generation if self.segments else None
+
+    @property
+    def newest(self):
+        return self.segments[-1].last if self.segments else None
+
+    def __len__(self):
+        return 0 if not self.segments else self.newest - self.oldest + 1
+
+    def __contains__(self, generation):
+        return bool(self.segments) and self.oldest <= generation <= self.newest
+
+    def clear(self):
+        self.segments.clear()
+        self.nbytes = 0
+        self.last = None
+
+    # Stores the boards (a tuple of (X, Y, ...) arrays, copied) as they are
+    # at generation. Recording a generation that is already in the history
+    # (after stepping back, or after editing the boards) replaces it and
+    # forgets everything after it.
+    def record(self, generation, boards):
+        boards = tuple(np.array(board) for board in boards)
+        if self.segments and generation <= self.newest:
+            self.truncate(generation)
+        if self.segments and generation != self.newest + 1:
+            self.clear()
+
+        if (not self.segments or len(self.segments[-1].deltas) + 1 >= self.keyframe_interval
+                or [b.shape for b in boards] != [b.shape for b in self.last]):
+            self.add_keyframe(generation, boards)
+        else:
+            changes = delta(self.last, boards)
+            size = sum(cells.nbytes + values.nbytes for cells, values in changes)
+            # a delta of most cells is bigger than the boards themselves
+            if size >= sum(board.nbytes for board in boards):
+                self.add_keyframe(generation, boards)
+            else:
+                segment = self.segments[-1]
+                segment.deltas.append(changes)
+                segment.nbytes += size
+                self.nbytes += size
+
+        self.last = boards
+        self.evict()
+
+    def add_keyframe(self, generation, boards):
+        segment = Segment(generation, boards)
+        self.segments.append(segment)
+        self.nbytes += segment.nbytes
+
+    # Drops the oldest segments until the history fits in max_bytes, always
+    # keeping the newest one
+    def evict(self):
+        while self.nbytes > self.max_bytes and len(self.segments) > 1:
+            self.nbytes -= self.segments.popleft().nbytes
+
+    # Forgets generation and everything after it
+    def truncate(self, generation):
+        while self.segments and self.segments[-1].generation >= generation:
+            self.segments.pop()
+        if self.segments:
+            segment = self.segments[-1]
+            del segment.deltas[generation - segment.generation - 1:]
+            segment.nbytes = sum(board.nbytes for board in segment.keyframe) + sum(
+                cells.nbytes + values.nbytes for changes in segment.deltas for cells, values in changes)
+
+        self.nbytes = sum(segment.nbytes for segment in self.segments)
+        self.last = self.get(generation - 1) if self.segments else None
+
+    # Copies of the boards at generation, rebuilt from the nearest keyframe
+    def get(self, generation):
+        if generation not in self:
+            raise KeyError(f'Generation {generation} is not in the history')
+
+        firsts = [segment.generation for segment in self.segments]
+        segment = self.segments[bisect.bisect_right(firsts, generation) - 1]
+        boards = tuple(board.copy() for board in segment.keyframe)
+        for changes in segment.deltas[:generation - segment.generation]:
+            apply_delta(boards, changes)
+        return boards
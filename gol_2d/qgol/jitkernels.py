@@ -0,0 +1,129 @@
+import numpy as np
+from numba import njit, prange
+
+from .liferule import FLIP, KEEP, TO_ALIVE, TO_DEAD
+
+# Compiled per-cell loops for the three 2D engines, parallel across rows
+# (prange over x). They follow the same arithmetic, in the same order, as
+# the numpy kernels so both backends give the same boards. Neighbours are
+# read through xs and ys, the rows and columns at -1 .. X and -1 .. Y given
+# by neighbours.ghost_indices (-1 for a dead cell). Only imported if numba
+# is installed, see backends.py.
+
+# What dsqgol_step does with a cell
+_DEAD, _ALIVE, _KEEP, _CLONE = range(4)
+
+
+# Classical engine on a board of ALIVE/DEAD cells, table being
+# rule.classical_table
+@njit(parallel=True, cache=True)
+def classical_step(board, table, xs, ys):
+    X, Y = board.shape[0], board.shape[1]
+    out = np.empty_like(board)
+    for x in prange(X):
+        for y in range(Y):
+            count = 0
+            for dx in range(-1, 2):
+                for dy in range(-1, 2):
+                    i, j = xs[x + dx + 1], ys[y + dy + 1]
+                    if (dx != 0 or dy != 0) and i >= 0 and j >= 0 and board[i, j, 0] == 1:
+                        count += 1
+            alive = table[1 if board[x, y, 0] == 1 else 0, count]
+            out[x, y, 0] = alive
+            out[x, y, 1] = 1 - alive
+
+    return out
+
+
+# Semi-quantum engine, table being rule.sqgol_table
+@njit(parallel=True, cache=True)
+def sqgol_step(board, table, xs, ys):
+    X, Y = board.shape[0], board.shape[1]
+    segments = table.shape[0]
+    out = np.empty_like(board)
+    for x in prange(X):
+        for y in range(Y):
+            a = 0.0
+            for dx in range(-1, 2):
+                for dy in range(-1, 2):
+                    i, j = xs[x + dx + 1], ys[y + dy + 1]
+                    if (dx != 0 or dy != 0) and i >= 0 and j >= 0:
+                        a += board[i, j, 0]
+
+            s = min(max(int(np.ceil(a)) - 1, 0), segments - 1)
+            keep = table[s, 0, KEEP] + a * table[s, 1, KEEP]
+            flip = table[s, 0, FLIP] + a * table[s, 1, FLIP]
+            to_alive = table[s, 0, TO_ALIVE] + a * table[s, 1, TO_ALIVE]
+            to_dead = table[s, 0, TO_DEAD] + a * table[s, 1, TO_DEAD]
+
+            alive = keep * board[x, y, 0] + flip * board[x, y, 1] + to_alive
+            dead = keep * board[x, y, 1] + flip * board[x, y, 0] + to_dead
+            norm = np.sqrt(alive * alive + dead * dead)
+            out[x, y, 0] = alive / norm
+            out[x, y, 1] = dead / norm
+
+    return out
+
+
+# Fully quantum engine (DSQGOL) on (X, Y, 2, 2) density matrices, with the
+# cloning machine given as dmkernel.CLONING_TABLE
+@njit(parallel=True, cache=True)
+def dsqgol_step(rho, cloning_table, xs, ys):
+    X, Y = rho.shape[0], rho.shape[1]
+    vectors = np.empty((X, Y, 2))
+    for x in prange(X):
+        for y in range(Y):
+            vectors[x, y, 0] = np.sqrt(max(rho[x, y, 0, 0], 0.0))
+            vectors[x, y, 1] = np.sqrt(max(rho[x, y, 1, 1], 0.0))
+
+    out = np.zeros_like(rho)
+    for x in prange(X):
+        pairs = np.empty(16)
+        for y in range(Y):
+            a = 0.0
+            dead = 0.0
+            for dx in range(-1, 2):
+                for dy in range(-1, 2):
+                    i, j = xs[x + dx + 1], ys[y + dy + 1]
+                    if (dx != 0 or dy != 0) and i >= 0 and j >= 0:
+                        a += vectors[i, j, 0]
+                        dead += vectors[i, j, 1]
+                    elif dx != 0 or dy != 0:
+                        dead += 1.0
+
+            to_clone = a > 1.5 and a <= 2.5
+            to_alive = a > 2.5 and a <= 3.5
+            if vectors[x, y, 0] > 0.98:
+                branch = _CLONE if to_clone else _ALIVE if to_alive else _DEAD
+            elif a < 0.02:
+                branch = _DEAD
+            elif to_clone or to_alive:
+                branch = _CLONE
+            elif a == 1:
+                branch = _KEEP
+            else:
+                branch = _DEAD
+
+            if branch == _ALIVE:
+                out[x, y, 0, 0] = 1.0
+            elif branch == _DEAD:
+                out[x, y, 1, 1] = 1.0
+            elif branch == _KEEP:
+                out[x, y] = rho[x, y]
+            else:
+                u = a / 8
+                v = dead / 8
+                norm = np.sqrt(u * u + v * v)
+                u /= norm
+                v /= norm
+                first = (u * u, u * v, v * u, v * v)
+                for k in range(4):
+                    for m in range(4):
+                        pairs[4 * k + m] = first[k] * first[m]
+                for i in range(4):
+                    total = 0.0
+                    for j in range(16):
+                        total += cloning_table[i, j] * pairs[j]
+                    out[x, y, i // 2, i % 2] = total
+
+    return out
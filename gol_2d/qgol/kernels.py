@@ -0,0 +1,46 @@
+import numpy as np
+
+from .liferule import FLIP, KEEP, TO_ALIVE, TO_DEAD
+from .neighbours import DEFAULT_BOUNDARY, NEIGHBOUR_OFFSETS, neighbour_sum
+
+ALIVE = np.array([1.0, 0.0])
+DEAD = np.array([0.0, 1.0])
+
+
+# Vectorized liveliness: sum of the alive components of the 8 neighbours of
+# every cell of a (..., X, Y, 2) board, past the edges as boundary says
+# (see neighbours.py)
+def liveliness(board, boundary=DEFAULT_BOUNDARY):
+    return neighbour_sum(np.asarray(board[..., 0], dtype=float), boundary)
+
+
+# Number of live neighbours of every cell of a (..., X, Y) boolean board
+def neighbour_counts(alive, boundary=DEFAULT_BOUNDARY):
+    return neighbour_sum(alive.astype(np.uint8), boundary)
+
+
+# One generation of the classical engine on (..., X, Y) boolean boards,
+# any number of them at once
+def classical_step_alive(alive, rule, boundary=DEFAULT_BOUNDARY):
+    return rule.classical_table[alive.astype(np.uint8), neighbour_counts(alive, boundary)].astype(bool)
+
+
+# One generation of the classical engine on a board of ALIVE/DEAD cells
+def classical_step(board, rule, boundary=DEFAULT_BOUNDARY):
+    alive = classical_step_alive(board[..., 0] == 1, rule, boundary)
+
+    return np.where(alive[..., np.newaxis], ALIVE, DEAD)
+
+
+# One generation of the semi-quantum engine (SQGOL for any rule)
+def sqgol_step(board, rule, boundary=DEFAULT_BOUNDARY):
+    a = liveliness(board, boundary)
+    segment = rule.sqgol_table[rule.segment(a)]
+    weights = segment[..., 0, :] + a[..., np.newaxis] * segment[..., 1, :]
+
+    value = (weights[..., KEEP, np.newaxis] * board
+             + weights[..., FLIP, np.newaxis] * board[..., ::-1]
+             + weights[..., TO_ALIVE, np.newaxis] * ALIVE
+             + weights[..., TO_DEAD, np.newaxis] * DEAD)
+
+    return value / np.linalg.norm(value, axis=-1, keepdims=True)
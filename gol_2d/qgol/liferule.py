@@ -0,0 +1,99 @@
+import numpy as np
+
+# Columns of the semi-quantum interpolation table: the weight given to the
+# cell's current value, to its flipped value, to ALIVE and to DEAD
+KEEP, FLIP, TO_ALIVE, TO_DEAD = range(4)
+
+SQRT2_PLUS_1 = np.sqrt(2) + 1
+
+
+# Life-like rule in B/S notation (e.g. 'B3/S23' for Conway's Game of Life),
+# precompiled into lookup tables for the classical and semi-quantum engines
+class LifeRule:
+    def __init__(self, birth, survival, neighbours=8):
+        self.birth = frozenset(birth)
+        self.survival = frozenset(survival)
+        self.neighbours = neighbours
+
+        for count in self.birth | self.survival:
+            if not 0 <= count <= neighbours:
+                raise ValueError(f'Neighbour count {count} out of range 0..{neighbours}')
+
+        # Classical engine: next state indexed by [current state, live neighbours]
+        self.classical_table = np.zeros((2, neighbours + 1), dtype=np.uint8)
+        self.classical_table[0, sorted(self.birth)] = 1
+        self.classical_table[1, sorted(self.survival)] = 1
+
+        # Semi-quantum engine: what happens at each integer liveliness.
+        # Birth and survival gives ALIVE, survival only keeps the value, birth
+        # only flips it and anything else gives DEAD, so B3/S23 reproduces the
+        # DEAD / value / ALIVE / DEAD nodes at 1, 2, 3 and 4 used by SQGOL.
+        nodes = np.zeros((neighbours + 1, 4))
+        for count in range(neighbours + 1):
+            born = count in self.birth
+            survives = count in self.survival
+            if born and survives:
+                nodes[count, TO_ALIVE] = 1
+            elif survives:
+                nodes[count, KEEP] = 1
+            elif born:
+                nodes[count, FLIP] = 1
+            else:
+                nodes[count, TO_DEAD] = 1
+        self.nodes = nodes
+
+        # Between nodes n and n + 1 SQGOL mixes them with weights
+        # (sqrt(2) + 1) * (n + 1 - a) and (a - n). Both are linear in the
+        # liveliness a, so each segment is stored as [intercept, slope] and
+        # the engine only needs one lookup per cell.
+        low = nodes[:-1]
+        high = nodes[1:]
+        n = np.arange(neighbours)[:, np.newaxis]
+        intercept = SQRT2_PLUS_1 * (n + 1) * low - n * high
+        slope = high - SQRT2_PLUS_1 * low
+        self.sqgol_table = np.stack([intercept, slope], axis=1)
+
+    # With more than 9 neighbours counts can have several digits, so they are
+    # comma separated and may be ranges: 'B5/S4-5' or 'B5,6/S4,5,7'
+    @classmethod
+    def parse(cls, spec, neighbours=8):
+        def counts(text):
+            if neighbours <= 9:
+                return [int(c) for c in text]
+            values = []
+            for item in filter(None, text.split(',')):
+                start, _, end = item.partition('-')
+                values.extend(range(int(start), int(end or start) + 1))
+            return values
+
+        birth = survival = None
+        for part in spec.upper().split('/'):
+            key, text = part[:1], part[1:]
+            if key == 'B' and birth is None:
+                birth = counts(text)
+            elif key == 'S' and survival is None:
+                survival = counts(text)
+            else:
+                raise ValueError(f'Invalid rule: {spec}')
+
+        if birth is None or survival is None:
+            raise ValueError(f'Invalid rule: {spec}')
+
+        return cls(birth, survival, neighbours)
+
+    def __str__(self):
+        separator = '' if self.neighbours <= 9 else ','
+        return 'B{}/S{}'.format(separator.join(str(c) for c in sorted(self.birth)),
+                                separator.join(str(c) for c in sorted(self.survival)))
+
+    def __repr__(self):
+        if self.neighbours != 8:
+            return f"LifeRule.parse('{self}', neighbours={self.neighbours})"
+        return f"LifeRule.parse('{self}')"
+
+    # Index of the interpolation segment (n, n + 1] containing liveliness a
+    def segment(self, a):
+        return np.clip(np.ceil(a) - 1, 0, self.neighbours - 1).astype(np.intp)
+
+
+CONWAY = LifeRule.parse('B3/S23')
@@ -0,0 +1,110 @@
+from functools import lru_cache
+
+import numpy as np
+
+# Neighbourhood access shared by every engine. What lies past the edges of a
+# board depends on its boundary:
+#   torus: the opposite edge (the board wraps around)
+#   dead: dead cells
+#   reflect: the board mirrored at the edge, so the cell just outside is the
+#     edge cell itself
+# Boards are read through a ghost layout: the board with one extra cell on
+# every side, built with a single gather from index tables computed once per
+# shape and boundary and shared by every caller.
+
+TORUS = 'torus'
+DEAD_EDGES = 'dead'
+REFLECT = 'reflect'
+BOUNDARIES = (TORUS, DEAD_EDGES, REFLECT)
+DEFAULT_BOUNDARY = TORUS
+
+# Offsets of the 8 neighbours, in the order liveliness() adds them up
+NEIGHBOUR_OFFSETS = [(dx, dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1)
+                     if (dx, dy) != (0, 0)]
+
+
+def check_boundary(boundary):
+    if boundary not in BOUNDARIES:
+        raise ValueError(f'Unknown boundary: {boundary} (choose from {", ".join(BOUNDARIES)})')
+
+
+# Cells along an axis of the given size for any coordinates, following the
+# boundary, -1 being a dead cell outside the board
+def fold(index, size, boundary=DEFAULT_BOUNDARY):
+    check_boundary(boundary)
+    index = np.asarray(index)
+    if boundary == TORUS:
+        return index % size
+    if boundary == REFLECT:
+        index = index % (2 * size)
+        return np.where(index < size, index, 2 * size - 1 - index)
+    return np.where((index >= 0) & (index < size), index, -1)
+
+
+# Cells at coordinates -1 .. size along an axis, as read by the ghost layout
+@lru_cache(maxsize=None)
+def ghost_indices(size, boundary=DEFAULT_BOUNDARY):
+    index = fold(np.arange(-1, size + 1), size, boundary).astype(np.intp)
+    index.setflags(write=False)
+    return index
+
+
+# (X + 2, Y + 2) flat indices of the cells of the ghost layout of an (X, Y)
+# board, -1 for dead cells
+@lru_cache(maxsize=None)
+def ghost_table(shape, boundary=DEFAULT_BOUNDARY):
+    X, Y = shape
+    xs = ghost_indices(X, boundary)[:, np.newaxis]
+    ys = ghost_indices(Y, boundary)[np.newaxis, :]
+    table = np.where((xs < 0) | (ys < 0), -1, xs * Y + ys)
+    table.setflags(write=False)
+    return table
+
+
+# Ghost layout of a (..., X, Y, *cell) board, cell being the last cell_ndim
+# axes (e.g. 1 for [alive, dead] amplitudes), with dead as the value of a
+# dead cell
+def ghost(values, boundary=DEFAULT_BOUNDARY, dead=0, cell_ndim=0):
+    values = np.asarray(values)
+    axis = values.ndim - cell_ndim - 2
+    X, Y = values.shape[axis:axis + 2]
+    flat = values.reshape(values.shape[:axis] + (X * Y,) + values.shape[axis + 2:])
+    table = ghost_table((X, Y), boundary)
+    padded = np.take(flat, table, axis=axis)
+    if boundary == DEAD_EDGES:
+        # the ghost cells are the ring around the board
+        cell = (slice(None),) * cell_ndim
+        for edge in ((0, slice(None)), (-1, slice(None)), (slice(None), 0), (slice(None), -1)):
+            padded[(Ellipsis,) + edge + cell] = dead
+    return padded
+
+
+# Sum over the 8 neighbours of every cell of a (..., X, Y, *cell) board
+def neighbour_sum(values, boundary=DEFAULT_BOUNDARY, dead=0, cell_ndim=0):
+    padded = ghost(values, boundary, dead, cell_ndim)
+    X, Y = padded.shape[padded.ndim - cell_ndim - 2:][:2]
+    cell = (slice(None),) * cell_ndim
+    total = np.zeros(padded[(Ellipsis, slice(1, -1), slice(1, -1)) + cell].shape, dtype=padded.dtype)
+    for dx, dy in NEIGHBOUR_OFFSETS:
+        total += padded[(Ellipsis, slice(1 + dx, X - 1 + dx), slice(1 + dy, Y - 1 + dy)) + cell]
+
+    return total
+
+
+# 3x3 neighbourhood of cell (x, y) of an (X, Y, *cell) board, the cell
+# itself in the middle, in the layout qrules expects
+def neighbourhood(board, x, y, boundary=DEFAULT_BOUNDARY, dead=0):
+    table = ghost_table(board.shape[:2], boundary)[x:x + 3, y:y + 3]
+    cells = board.reshape((-1,) + board.shape[2:])[table]
+    if boundary == DEAD_EDGES:
+        cells[table < 0] = dead
+    return cells
+
+
+# Cells of an (X, Y) board for an (N, 2) array of any coordinates, following
+# the boundary, and the mask of those that are on the board (all of them
+# unless the edges are dead)
+def board_cells(cells, shape, boundary=DEFAULT_BOUNDARY):
+    cells = np.stack([fold(cells[:, 0], shape[0], boundary),
+                      fold(cells[:, 1], shape[1], boundary)], axis=1)
+    return cells, (cells >= 0).all(axis=1)
@@ -37,6 +37,9 @@ def SQGOL(nhood):
 
 
 def init_quantum(nhood):
+    from qiskit import Aer, QuantumCircuit, QuantumRegister, execute
+    from qiskit.quantum_info import partial_trace
+
     v = nhood
     a = (v[0][0] + v[0][1] + v[0][2] + v[1][0] + v[1][2] + v[2][0] + v[2][1] +
          v[2][2]) / 8
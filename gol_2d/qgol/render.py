@@ -0,0 +1,186 @@
+import os
+import queue
+import shutil
+import struct
+import subprocess
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+# Offscreen rendering of boards to RGB images, without pygame or a display.
+# The GUI draws its views with these too (through viewport.Camera).
+
+BLANK_SPACE = 40
+
+# GUI layout: pixels per cell, width of the cell borders and pixels between
+# two boards
+PIXEL_SIZE = 10
+LINE_WIDTH = 4
+INTERSPACE = 50
+
+
+# Grey level for a probability of being dead: white when surely alive,
+# black when surely dead
+def shade(dead_probability):
+    return (255.0 - np.floor(dead_probability * 255)).astype(np.uint8)
+
+
+# Grey level of every cell of a (X, Y, 2) quantum board
+def quantum_shades(board):
+    return shade(board[..., 1]**2)
+
+
+# White for ALIVE and black for anything else
+def classical_shades(board):
+    return np.where(board[..., 0] == 1, 255, 0).astype(np.uint8)
+
+
+# Pixels of one cell that are painted: a border line_width thick, or the
+# whole square if line_width is None
+def cell_mask(pixel_size, line_width=None):
+    if line_width is None:
+        return np.ones((pixel_size, pixel_size), dtype=bool)
+
+    i = np.arange(pixel_size)
+    edge = np.minimum(i, pixel_size - 1 - i)
+    return np.minimum.outer(edge, edge) < line_width
+
+
+# Turns a (X, Y) array of grey levels into a (Y * pixel_size, X * pixel_size, 3)
+# RGB image, one pixel_size square per cell on a black background
+def to_image(shades, pixel_size=1, line_width=None):
+    image = shades.T
+    if pixel_size > 1:
+        image = np.repeat(np.repeat(image, pixel_size, axis=0), pixel_size, axis=1)
+        mask = np.tile(cell_mask(pixel_size, line_width), shades.T.shape)
+        image = np.where(mask, image, 0).astype(np.uint8)
+
+    return np.repeat(image[..., np.newaxis], 3, axis=2)
+
+
+# Classical and quantum boards side by side, as laid out in the GUI, and
+# the fully quantum board (as amplitudes) next to them if given
+def compose_frame(grid_classical, grid_quantum, pixel_size=1, line_width=None,
+                  interspace=0, grid_fully_quantum=None):
+    panels = [to_image(classical_shades(grid_classical), pixel_size, line_width),
+              to_image(quantum_shades(grid_quantum), pixel_size, line_width)]
+    if grid_fully_quantum is not None:
+        panels.append(to_image(quantum_shades(grid_fully_quantum), pixel_size, line_width))
+    gap = np.full((panels[0].shape[0], interspace, 3), BLANK_SPACE, dtype=np.uint8)
+
+    parts = [panels[0]]
+    for panel in panels[1:]:
+        parts += [gap, panel]
+    return np.concatenate(parts, axis=1)
+
+
+def encode_png(image):
+    height, width, _ = image.shape
+    # filter type 0 (None) in front of every row
+    raw = np.zeros((height, width * 3 + 1), dtype=np.uint8)
+    raw[:, 1:] = image.reshape(height, width * 3)
+
+    def chunk(kind, data):
+        body = kind + data
+        return struct.pack('>I', len(data)) + body + struct.pack('>I', zlib.crc32(body))
+
+    header = struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)
+    return (b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', header)
+            + chunk(b'IDAT', zlib.compress(raw.tobytes(), 6)) + chunk(b'IEND', b''))
+
+
+def write_png(path, image):
+    with open(path, 'wb') as png_file:
+        png_file.write(encode_png(image))
+
+
+# Writes frames as numbered PNG files from a pool of threads, so encoding
+# runs while the simulation computes the next generation. At most
+# max_pending frames are queued; submit() blocks beyond that.
+class PngSequenceWriter:
+    def __init__(self, directory, workers=4, max_pending=16, prefix='frame'):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.prefix = prefix
+        self.pool = ThreadPoolExecutor(max_workers=workers)
+        self.slots = threading.BoundedSemaphore(max_pending)
+        self.futures = []
+
+    def submit(self, index, image):
+        path = os.path.join(self.directory, f'{self.prefix}_{index:06d}.png')
+        self.slots.acquire()
+        future = self.pool.submit(write_png, path, image)
+        future.add_done_callback(lambda _: self.slots.release())
+        self.futures.append(future)
+
+        # surface encoding errors of finished frames instead of losing them
+        pending = []
+        for f in self.futures:
+            if f.done():
+                f.result()
+            else:
+                pending.append(f)
+        self.futures = pending
+
+    def close(self):
+        self.pool.shutdown(wait=True)
+        for future in self.futures:
+            future.result()
+
+
+# Pipes raw RGB frames to a local encoder (ffmpeg by default) from a
+# background thread. Frames must all have the same size. The encoder must be
+# on the PATH, which is checked up front rather than at the first frame.
+class VideoWriter:
+    def __init__(self, path, fps=30, encoder='ffmpeg', max_pending=16):
+        if shutil.which(encoder) is None:
+            raise RuntimeError(f'Writing videos requires {encoder}, which was not found on the PATH')
+        self.path = path
+        self.fps = fps
+        self.encoder = encoder
+        self.frames = queue.Queue(max_pending)
+        self.process = None
+        self.thread = None
+        self.error = None
+
+    def _start(self, image):
+        height, width, _ = image.shape
+        command = [self.encoder, '-loglevel', 'error', '-y',
+                   '-f', 'rawvideo', '-pix_fmt', 'rgb24',
+                   '-s', f'{width}x{height}', '-r', str(self.fps), '-i', '-',
+                   '-pix_fmt', 'yuv420p', self.path]
+        self.process = subprocess.Popen(command, stdin=subprocess.PIPE)
+        self.thread = threading.Thread(target=self._pump, daemon=True)
+        self.thread.start()
+
+    def _pump(self):
+        while True:
+            image = self.frames.get()
+            if image is None:
+                break
+            if self.error is not None:
+                continue
+            try:
+                self.process.stdin.write(np.ascontiguousarray(image).tobytes())
+            except OSError as error:
+                self.error = error
+
+    def submit(self, index, image):
+        if self.process is None:
+            self._start(image)
+        if self.error is not None:
+            raise self.error
+        self.frames.put(image)
+
+    def close(self):
+        if self.process is None:
+            return
+        self.frames.put(None)
+        self.thread.join()
+        self.process.stdin.close()
+        if self.process.wait() != 0:
+            raise RuntimeError(f'{self.encoder} exited with status {self.process.returncode}')
+        if self.error is not None:
+            raise self.error
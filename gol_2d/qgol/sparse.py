@@ -0,0 +1,185 @@
+import numpy as np
+
+from . import dmkernel, kernels
+
+# Unbounded boards: the plane is cut into chunk_size x chunk_size chunks and
+# only chunks with a cell that is not fully dead are stored, in a dict keyed
+# by chunk coordinates. Every generation all the chunks that can change are
+# stacked with a one cell halo taken from their neighbours and stepped by
+# the ordinary kernels in one call; chunks that end up all dead are freed.
+# This relies on dead cells with dead neighbourhoods staying dead, which
+# holds for every rule without B0.
+
+CHUNK_SIZE = 32
+
+# Chunks around a chunk, as offsets in chunk coordinates
+CHUNK_NEIGHBOURS = [(dx, dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1) if (dx, dy) != (0, 0)]
+
+
+# Rows (or columns) of a chunk that touch the neighbour at offset d:
+# the first one for -1, the last one for 1, all of them for 0
+def _edge(d, size):
+    return {-1: slice(0, 1), 0: slice(0, size), 1: slice(size - 1, size)}[d]
+
+
+# Rows (or columns) of the padded chunk the halo from the neighbour at
+# offset d goes to, and the rows of that neighbour it comes from
+def _halo(d, size):
+    return {-1: (slice(0, 1), slice(size - 1, size)),
+            0: (slice(1, size + 1), slice(0, size)),
+            1: (slice(size + 1, size + 2), slice(0, 1))}[d]
+
+
+class SparseBoard:
+    def __init__(self, dead, chunk_size=CHUNK_SIZE):
+        '''
+        Inputs: the value of a dead cell (e.g. kernels.DEAD, or
+        dmkernel.DEAD_DM for density matrices) and the chunk size in cells
+        '''
+        self.dead = np.asarray(dead, dtype=float)
+        self.chunk_size = chunk_size
+        self.chunks = {}
+
+    @classmethod
+    def from_dense(cls, board, dead=kernels.DEAD, chunk_size=CHUNK_SIZE, origin=(0, 0)):
+        sparse = cls(dead, chunk_size)
+        sparse.paste(board, origin)
+        return sparse
+
+    @property
+    def cell_shape(self):
+        return self.dead.shape
+
+    @property
+    def nbytes(self):
+        return sum(chunk.nbytes for chunk in self.chunks.values())
+
+    def __len__(self):
+        return len(self.chunks)
+
+    def empty_chunk(self):
+        return np.tile(self.dead, (self.chunk_size, self.chunk_size) + (1,) * self.dead.ndim)
+
+    # (K, C, C) mask of the cells that are not dead in a stack of chunks
+    def alive_cells(self, stack):
+        axes = tuple(range(3, stack.ndim))
+        return np.any(stack != self.dead, axis=axes)
+
+    # Writes a dense (X, Y, ...) board with its cell (0, 0) at origin
+    def paste(self, board, origin=(0, 0)):
+        C = self.chunk_size
+        x0, y0 = origin
+        for cx in range(x0 // C, (x0 + board.shape[0] - 1) // C + 1):
+            for cy in range(y0 // C, (y0 + board.shape[1] - 1) // C + 1):
+                # overlap of the chunk with the board, in board coordinates
+                xs = slice(max(cx * C - x0, 0), min((cx + 1) * C - x0, board.shape[0]))
+                ys = slice(max(cy * C - y0, 0), min((cy + 1) * C - y0, board.shape[1]))
+                chunk = self.chunks.get((cx, cy))
+                if chunk is None:
+                    chunk = self.empty_chunk()
+                chunk[xs.start + x0 - cx * C:xs.stop + x0 - cx * C,
+                      ys.start + y0 - cy * C:ys.stop + y0 - cy * C] = board[xs, ys]
+                if self.alive_cells(chunk[np.newaxis]).any():
+                    self.chunks[(cx, cy)] = chunk
+                else:
+                    self.chunks.pop((cx, cy), None)
+
+    # Dense (width, height, ...) copy of the window with its cell (0, 0) at origin
+    def window(self, origin, shape):
+        C = self.chunk_size
+        x0, y0 = origin
+        width, height = shape
+        board = np.tile(self.dead, (width, height) + (1,) * self.dead.ndim)
+        for (cx, cy), chunk in self.chunks.items():
+            xs = slice(max(cx * C, x0), min((cx + 1) * C, x0 + width))
+            ys = slice(max(cy * C, y0), min((cy + 1) * C, y0 + height))
+            if xs.start < xs.stop and ys.start < ys.stop:
+                board[xs.start - x0:xs.stop - x0, ys.start - y0:ys.stop - y0] = \
+                    chunk[xs.start - cx * C:xs.stop - cx * C, ys.start - cy * C:ys.stop - cy * C]
+        return board
+
+    # Smallest (x_min, y_min, x_max, y_max) box around the cells that are
+    # not dead, or None if there are none
+    def bounds(self):
+        if not self.chunks:
+            return None
+        keys = list(self.chunks)
+        cells = self.alive_cells(np.stack([self.chunks[key] for key in keys]))
+        boxes = []
+        for (cx, cy), mask in zip(keys, cells):
+            xs, ys = np.nonzero(mask)
+            boxes.append((cx * self.chunk_size + xs.min(), cy * self.chunk_size + ys.min(),
+                          cx * self.chunk_size + xs.max(), cy * self.chunk_size + ys.max()))
+        boxes = np.array(boxes)
+        return (*boxes[:, :2].min(axis=0).tolist(), *boxes[:, 2:].max(axis=0).tolist())
+
+    # One generation: kernel steps a (K, C + 2, C + 2, ...) stack of chunks
+    # with their halos, wrapping around the edges as the dense kernels do,
+    # which only affects the halo cells that are thrown away
+    def step(self, kernel):
+        C = self.chunk_size
+        keys = list(self.chunks)
+        if not keys:
+            return self
+
+        # chunks that change: the stored ones, and empty neighbours next to
+        # an edge with a cell that is not dead
+        stack = np.stack([self.chunks[key] for key in keys])
+        cells = self.alive_cells(stack)
+        active = dict.fromkeys(keys)
+        for dx, dy in CHUNK_NEIGHBOURS:
+            touching = cells[:, _edge(dx, C), _edge(dy, C)].any(axis=(1, 2))
+            for (cx, cy), touches in zip(keys, touching):
+                if touches:
+                    active.setdefault((cx + dx, cy + dy))
+        active = list(active)
+
+        # all chunks, plus an empty one at the end for missing neighbours
+        stack = np.concatenate([stack, self.empty_chunk()[np.newaxis]])
+        index = {key: i for i, key in enumerate(keys)}
+        empty = len(keys)
+
+        padded = np.empty((len(active), C + 2, C + 2) + self.cell_shape)
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                neighbours = [index.get((cx + dx, cy + dy), empty) for cx, cy in active]
+                to_x, from_x = _halo(dx, C)
+                to_y, from_y = _halo(dy, C)
+                padded[:, to_x, to_y] = stack[:, from_x, from_y][neighbours]
+
+        stepped = kernel(padded)[:, 1:-1, 1:-1]
+        keep = self.alive_cells(stepped).any(axis=(1, 2))
+
+        board = SparseBoard(self.dead, C)
+        board.chunks = {key: chunk.copy() for key, chunk, kept in zip(active, stepped, keep) if kept}
+        return board
+
+
+def _check_rule(rule):
+    if 0 in rule.birth:
+        raise ValueError(f'Rule {rule} gives birth on empty space, it cannot run on an unbounded board')
+
+
+# One generation of the semi-quantum engine on an unbounded board, the
+# chunks being stepped by backend if given (see backends.py)
+def sqgol_step(board, rule, backend=None):
+    _check_rule(rule)
+    if backend is not None:
+        return board.step(lambda padded: backend.sqgol_step_stack(padded, rule))
+    return board.step(lambda padded: kernels.sqgol_step(padded, rule))
+
+
+# One generation of the classical engine on an unbounded board
+def classical_step(board, rule, backend=None):
+    _check_rule(rule)
+    if backend is not None:
+        return board.step(lambda padded: backend.classical_step_stack(padded, rule))
+    return board.step(lambda padded: kernels.classical_step(padded, rule))
+
+
+# One generation of the fully quantum engine on an unbounded board of
+# density matrices (dead being dmkernel.DEAD_DM)
+def dsqgol_step(board, backend=None):
+    if backend is not None:
+        return board.step(backend.dsqgol_step_stack)
+    return board.step(dmkernel.dsqgol_step)
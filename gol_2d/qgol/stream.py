@@ -0,0 +1,255 @@
+import asyncio
+import base64
+import json
+import threading
+import zlib
+
+import numpy as np
+
+from .render import classical_shades, quantum_shades
+
+# Streams board updates to browsers over server-sent events. Every client
+# gets a keyframe with all cells first and then per-generation deltas with
+# only the cells whose displayed shade changed. Each client has a small
+# queue: when it is full the frame is dropped for that client, which then
+# gets a fresh keyframe, so a slow client never holds up the simulation.
+
+VIEWER_PAGE = '''<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>Quantum Game of Life</title>
+<style>
+body { background: #282828; color: #fff; font-family: sans-serif; }
+canvas { image-rendering: pixelated; width: 45%; margin: 1%; background: #000; }
+</style>
+</head>
+<body>
+<div id="status">Connecting...</div>
+<canvas id="classical"></canvas><canvas id="quantum"></canvas>
+<script>
+const boards = {};
+
+async function inflate(text) {
+  const bytes = Uint8Array.from(atob(text), c => c.charCodeAt(0));
+  const stream = new Blob([bytes]).stream().pipeThrough(new DecompressionStream('deflate'));
+  return new Uint8Array(await new Response(stream).arrayBuffer());
+}
+
+async function apply(name, update, frame) {
+  const canvas = document.getElementById(name);
+  if (frame.keyframe || !boards[name]) {
+    canvas.width = frame.width;
+    canvas.height = frame.height;
+    boards[name] = canvas.getContext('2d').createImageData(frame.width, frame.height);
+  }
+  const image = boards[name];
+  const data = await inflate(update.data);
+  const set = (i, v) => {
+    const x = Math.floor(i / frame.height), y = i % frame.height;
+    const p = 4 * (y * frame.width + x);
+    image.data[p] = image.data[p + 1] = image.data[p + 2] = v;
+    image.data[p + 3] = 255;
+  };
+  if (update.count < 0) {
+    data.forEach((v, i) => set(i, v));
+  } else {
+    const indices = new DataView(data.buffer);
+    for (let k = 0; k < update.count; k++) {
+      set(indices.getUint32(4 * k, true), data[4 * update.count + k]);
+    }
+  }
+  canvas.getContext('2d').putImageData(image, 0, 0);
+}
+
+let queue = Promise.resolve();
+const events = new EventSource('/events');
+events.onmessage = (message) => {
+  const frame = JSON.parse(message.data);
+  queue = queue.then(async () => {
+    await apply('classical', frame.classical, frame);
+    await apply('quantum', frame.quantum, frame);
+    document.getElementById('status').textContent = 'Generation ' + frame.generation;
+  });
+};
+events.onerror = () => { document.getElementById('status').textContent = 'Disconnected'; };
+</script>
+</body>
+</html>
+'''
+
+
+def _pack(data):
+    return base64.b64encode(zlib.compress(data, 1)).decode('ascii')
+
+
+# Cells that differ from the previous shades: indices into the flattened
+# (X, Y) board as little-endian uint32, followed by the new values
+def encode_delta(previous, shades):
+    indices = np.flatnonzero(previous != shades)
+    data = indices.astype('<u4').tobytes() + shades.ravel()[indices].tobytes()
+    return {'count': len(indices), 'data': _pack(data)}
+
+
+def encode_keyframe(shades):
+    return {'count': -1, 'data': _pack(shades.tobytes())}
+
+
+# Rebuilds shades from a keyframe or a delta, as the viewer page does
+def decode_update(update, previous, shape):
+    data = zlib.decompress(base64.b64decode(update['data']))
+    if update['count'] < 0:
+        return np.frombuffer(data, dtype=np.uint8).reshape(shape).copy()
+
+    count = update['count']
+    indices = np.frombuffer(data[:4 * count], dtype='<u4')
+    shades = previous.copy()
+    shades.ravel()[indices] = np.frombuffer(data[4 * count:], dtype=np.uint8)
+    return shades
+
+
+class _Client:
+    def __init__(self, max_queue):
+        self.frames = asyncio.Queue(max_queue)
+        self.needs_keyframe = True
+
+
+class BoardStream:
+    def __init__(self, host='127.0.0.1', port=8765, max_queue=4):
+        self.host = host
+        self.port = port
+        self.max_queue = max_queue
+        self.clients = set()
+        self.dropped = 0
+        self._loop = None
+        self._server = None
+        self._thread = None
+        self._latest = None
+
+    # Starts the server in a background thread; port 0 picks a free port
+    def start(self):
+        ready = threading.Event()
+
+        def serve():
+            self._loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(self._loop)
+            self._server = self._loop.run_until_complete(
+                asyncio.start_server(self._handle, self.host, self.port))
+            self.port = self._server.sockets[0].getsockname()[1]
+            ready.set()
+            self._loop.run_forever()
+
+        self._thread = threading.Thread(target=serve, daemon=True)
+        self._thread.start()
+        ready.wait()
+        return self
+
+    def close(self):
+        if self._loop is None:
+            return
+
+        async def shutdown():
+            self._server.close()
+            handlers = [task for task in asyncio.all_tasks()
+                        if task is not asyncio.current_task()]
+            for task in handlers:
+                task.cancel()
+            await asyncio.gather(*handlers, return_exceptions=True)
+            await self._server.wait_closed()
+
+        asyncio.run_coroutine_threadsafe(shutdown(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+        self._loop = None
+
+    @property
+    def url(self):
+        return f'http://{self.host}:{self.port}/'
+
+    # Called from the simulation after each generation. Never blocks, and
+    # only computes the shades: the messages are encoded by _dispatch on the
+    # server thread, and not at all while no client is connected. A client
+    # that connects in between is added before it reads _latest, and
+    # _latest is set here before clients is read, so it either gets this
+    # generation as its keyframe or this generation is dispatched to it.
+    def publish(self, generation, grid_quantum, grid_classical):
+        shades = (classical_shades(grid_classical), quantum_shades(grid_quantum))
+        previous = self._latest[1] if self._latest is not None else None
+        self._latest = (generation, shades)
+
+        if self._loop is not None and self.clients:
+            self._loop.call_soon_threadsafe(self._dispatch, generation, shades, previous)
+
+    def _frame(self, generation, shades, classical, quantum, keyframe):
+        width, height = shades[0].shape
+        return {'generation': generation, 'width': width, 'height': height,
+                'keyframe': keyframe, 'classical': classical, 'quantum': quantum}
+
+    def _keyframe(self, generation, shades):
+        return json.dumps(self._frame(generation, shades, encode_keyframe(shades[0]),
+                                      encode_keyframe(shades[1]), True))
+
+    def _dispatch(self, generation, shades, previous):
+        keyframe = delta = None
+        for client in list(self.clients):
+            if client.needs_keyframe or previous is None or previous[0].shape != shades[0].shape:
+                if keyframe is None:
+                    keyframe = self._keyframe(generation, shades)
+                message = keyframe
+            else:
+                if delta is None:
+                    delta = json.dumps(self._frame(generation, shades, encode_delta(previous[0], shades[0]),
+                                                   encode_delta(previous[1], shades[1]), False))
+                message = delta
+
+            try:
+                client.frames.put_nowait(message)
+                client.needs_keyframe = False
+            except asyncio.QueueFull:
+                # the client missed this generation, so deltas would no
+                # longer apply: send it a full board next time
+                client.needs_keyframe = True
+                self.dropped += 1
+
+    async def _handle(self, reader, writer):
+        try:
+            request = await reader.readline()
+            while (await reader.readline()) not in (b'\r\n', b'\n', b''):
+                pass
+
+            parts = request.decode('latin-1').split()
+            path = parts[1] if len(parts) > 1 else '/'
+            if path == '/events':
+                await self._stream_events(writer)
+            elif path in ('/', '/index.html'):
+                body = VIEWER_PAGE.encode('utf-8')
+                writer.write(b'HTTP/1.1 200 OK\r\nContent-Type: text/html; charset=utf-8\r\n'
+                             + f'Content-Length: {len(body)}\r\nConnection: close\r\n\r\n'.encode()
+                             + body)
+            else:
+                writer.write(b'HTTP/1.1 404 Not Found\r\nContent-Length: 0\r\nConnection: close\r\n\r\n')
+            await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.CancelledError):
+            # client gone or server shutting down
+            pass
+        finally:
+            writer.close()
+
+    async def _stream_events(self, writer):
+        writer.write(b'HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\n'
+                     b'Cache-Control: no-cache\r\nConnection: keep-alive\r\n\r\n')
+        await writer.drain()
+
+        client = _Client(self.max_queue)
+        self.clients.add(client)
+        try:
+            if self._latest is not None:
+                client.frames.put_nowait(self._keyframe(*self._latest))
+                client.needs_keyframe = False
+            while True:
+                message = await client.frames.get()
+                writer.write(f'data: {message}\n\n'.encode('utf-8'))
+                await writer.drain()
+        finally:
+            self.clients.discard(client)
@@ -0,0 +1,139 @@
+import numpy as np
+
+from .render import shade, to_image
+
+# Zoom levels as (pixels per cell, cells per pixel). Zooming out past one
+# pixel per cell shows each pixel as a reduced block of cells. A camera
+# stops zooming out at the first level that shows the whole board.
+ZOOM_LEVELS = [(32, 1), (24, 1), (20, 1), (16, 1), (12, 1), (10, 1), (8, 1),
+               (6, 1), (4, 1), (3, 1), (2, 1), (1, 1), (1, 2), (1, 4), (1, 8),
+               (1, 16), (1, 32)]
+
+
+def _mean_square(blocks, axis):
+    return np.mean(blocks**2, axis=axis)
+
+
+# Pan and zoom over a toroidal board shown in a view of view_size pixels.
+# Only the cells inside the view are read, and blocks of cells are reduced
+# with array operations when zoomed out, so drawing a frame costs the same
+# whatever the board size.
+class Camera:
+    def __init__(self, board_shape, view_size, pixel_size=10, line_width=None):
+        self.board_shape = tuple(board_shape)
+        self.view_size = tuple(view_size)
+        self.pixel_size = pixel_size
+        self.line_width = line_width
+        self.max_level = next((level for level in range(len(ZOOM_LEVELS))
+                               if all(count >= size for count, size in
+                                      zip(self.counts(level), self.board_shape))),
+                              len(ZOOM_LEVELS) - 1)
+        self.home_level = min(range(self.max_level + 1),
+                              key=lambda i: abs(ZOOM_LEVELS[i][0] - pixel_size))
+        self.home()
+
+    # Back to the initial zoom with the board's top-left corner in view
+    def home(self):
+        self.level = self.home_level
+        self.origin = [0, 0]
+        self._pan_pixels = [0, 0]
+
+    @property
+    def pixels(self):
+        return ZOOM_LEVELS[self.level][0]
+
+    @property
+    def block(self):
+        return ZOOM_LEVELS[self.level][1]
+
+    # Cells along each axis read by window() at a zoom level: whole blocks
+    # covering the view
+    def counts(self, level=None):
+        pixels, block = ZOOM_LEVELS[self.level if level is None else level]
+        return [-(-self.view_size[axis] // pixels) * block for axis in range(2)]
+
+    def contains(self, px, py):
+        return 0 <= px < self.view_size[0] and 0 <= py < self.view_size[1]
+
+    # Cell shown at pixel (px, py) of the view before wrapping around the
+    # board, so cells next to each other on screen stay next to each other
+    # across the edges of the board
+    def screen_to_view_cell(self, px, py):
+        return (self.origin[0] + px // self.pixels * self.block,
+                self.origin[1] + py // self.pixels * self.block)
+
+    # Board cell shown at pixel (px, py) of the view
+    def screen_to_cell(self, px, py):
+        x, y = self.screen_to_view_cell(px, py)
+        return x % self.board_shape[0], y % self.board_shape[1]
+
+    # Pixel of the view where the top-left corner of cell (x, y) is shown,
+    # None if it is out of view
+    def cell_to_screen(self, x, y):
+        dx = (x - self.origin[0]) % self.board_shape[0]
+        dy = (y - self.origin[1]) % self.board_shape[1]
+        px = dx // self.block * self.pixels
+        py = dy // self.block * self.pixels
+        if self.contains(px, py):
+            return px, py
+        return None
+
+    # Moves the view by (dx, dy) pixels, e.g. when dragging the board
+    def pan(self, dx, dy):
+        for axis, delta in enumerate((dx, dy)):
+            self._pan_pixels[axis] += delta
+            cells, self._pan_pixels[axis] = divmod(self._pan_pixels[axis], self.pixels)
+            self.origin[axis] = int(self.origin[axis] - cells * self.block) % self.board_shape[axis]
+
+    # Zooms in (steps > 0) or out keeping the cell under pixel `anchor` in place
+    def zoom(self, steps, anchor=None):
+        level = min(max(self.level - steps, 0), self.max_level)
+        if level == self.level:
+            return
+
+        if anchor is None:
+            anchor = (self.view_size[0] // 2, self.view_size[1] // 2)
+        anchored = [self.origin[axis] + anchor[axis] // self.pixels * self.block
+                    for axis in range(2)]
+        self.level = level
+        self._pan_pixels = [0, 0]
+        for axis in range(2):
+            offset = anchor[axis] // self.pixels * self.block
+            self.origin[axis] = (anchored[axis] - offset) % self.board_shape[axis]
+
+    # Cells of a (X, Y, ...) array inside the view, wrapping around the board.
+    # When zoomed out each block of cells is combined with `reduce`.
+    def window(self, values, reduce=np.mean):
+        counts = self.counts()
+        xs = (self.origin[0] + np.arange(counts[0])) % self.board_shape[0]
+        ys = (self.origin[1] + np.arange(counts[1])) % self.board_shape[1]
+        cells = values[np.ix_(xs, ys)]
+
+        if self.block > 1:
+            nx, ny = counts[0] // self.block, counts[1] // self.block
+            cells = reduce(cells.reshape((nx, self.block, ny, self.block) + cells.shape[2:]),
+                           axis=(1, 3))
+
+        return cells
+
+    def _image(self, shades):
+        line_width = None
+        if self.line_width is not None:
+            line_width = self.line_width * self.pixels // self.pixel_size or None
+        image = to_image(shades, self.pixels, line_width)
+
+        return image[:self.view_size[1], :self.view_size[0]]
+
+    # (height, width, 3) image of the visible part of a quantum board. Blocks
+    # show the mean probability of being dead.
+    def render_quantum(self, board):
+        dead = self.window(board[..., 1], _mean_square)
+        if self.block == 1:
+            dead = dead**2
+        return self._image(shade(dead))
+
+    # (height, width, 3) image of the visible part of a classical board.
+    # Blocks are shown alive if any of their cells is alive.
+    def render_classical(self, board):
+        alive = self.window(board[..., 0] == 1, np.max)
+        return self._image(np.where(alive, 255, 0).astype(np.uint8))
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'gol_2d'))
+
+from qgol.liferule import FLIP, KEEP, TO_ALIVE, TO_DEAD, LifeRule
+
+NEIGHBOURS = 26
+
+MODES = ('sqgol', 'classical')
+
+
+# Birth/survival thresholds for the 26-cell neighbourhood, compiled by the
+# same LifeRule as the 2D boards. Counts go above 9, so they are comma
+# separated and may be ranges: 'B5/S4-5' or 'B5,6/S4,5,7'.
+def parse_rule(spec):
+    return LifeRule.parse(spec, NEIGHBOURS)
+
+
+# Adds the two wrapped-around neighbours along `axis` to every cell of src,
+# writing into dst without allocating temporaries
+def _add_axis_neighbours(src, dst, axis):
+    s = np.moveaxis(src, axis, 0)
+    d = np.moveaxis(dst, axis, 0)
+    d[...] = s
+    d[1:] += s[:-1]
+    d[0] += s[-1]
+    d[:-1] += s[1:]
+    d[-1] += s[0]
+
+
+# Semi-quantum (or classical) Game of Life on a periodic 3D board.
+# Each cell is stored as a single number: the alive amplitude a (the dead
+# amplitude being sqrt(1 - a^2)) in 'sqgol' mode, or 0/1 in 'classical'
+# mode, so every buffer is one compact array of the board's shape.
+class Life3D:
+    def __init__(self, shape, rule, mode='sqgol', dtype=np.float32):
+        if mode not in MODES:
+            raise ValueError(f'Unknown mode: {mode}')
+        if rule.neighbours != NEIGHBOURS:
+            raise ValueError(f'Rule {rule} is for {rule.neighbours} neighbours, not {NEIGHBOURS}')
+
+        self.shape = tuple(shape)
+        self.rule = rule
+        self.mode = mode
+        self.generation = 0
+
+        dtype = dtype if mode == 'sqgol' else np.uint8
+        self.cells = np.zeros(self.shape, dtype=dtype)
+        self._sum = np.empty(self.shape, dtype=dtype)
+        self._tmp = np.empty(self.shape, dtype=dtype)
+
+    # Random board, with quantum cells picked like random_cell in gol_2d:
+    # the dead amplitude is clamped to DEAD above sp_up and ALIVE below sp_down
+    def randomize(self, rng, sp_up=0.51, sp_down=0.48):
+        a = rng.random(self.shape, dtype=np.float32)
+        b = np.sqrt(1 - a**2)
+        a[b >= sp_up] = 0
+        a[b <= sp_down] = 1
+        if self.mode == 'classical':
+            a = b < 0.5
+        self.cells[...] = a
+        self.generation = 0
+
+    # Sum of the alive amplitudes of the 26 neighbours of every cell
+    def liveliness(self):
+        _add_axis_neighbours(self.cells, self._sum, 0)
+        _add_axis_neighbours(self._sum, self._tmp, 1)
+        _add_axis_neighbours(self._tmp, self._sum, 2)
+        self._sum -= self.cells
+        return self._sum
+
+    def step(self):
+        a = self.liveliness()
+        if self.mode == 'classical':
+            self.cells[...] = self.rule.classical_table[self.cells, a]
+        else:
+            self._sqgol_step(a)
+        self.generation += 1
+
+    def _sqgol_step(self, a):
+        segment = np.clip(np.ceil(a) - 1, 0, NEIGHBOURS - 1).astype(np.uint8)
+        table = self.rule.sqgol_table.astype(self.cells.dtype)
+        intercept = table[:, 0]
+        slope = table[:, 1]
+
+        value = self.cells
+        flipped = np.sqrt(1 - np.minimum(value**2, 1))
+        new_alive = np.zeros_like(value)
+        new_dead = np.zeros_like(value)
+        for column, alive_part, dead_part in ((KEEP, value, flipped),
+                                              (FLIP, flipped, value),
+                                              (TO_ALIVE, 1, 0),
+                                              (TO_DEAD, 0, 1)):
+            weight = intercept[segment, column] + a * slope[segment, column]
+            new_alive += weight * alive_part
+            new_dead += weight * dead_part
+            del weight
+
+        norm = np.hypot(new_alive, new_dead)
+        np.divide(new_alive, norm, out=self.cells)
+
+    # Probability of each cell being alive
+    def probabilities(self):
+        if self.mode == 'classical':
+            return self.cells.astype(np.float32)
+        return self.cells**2
+
+    def population(self):
+        return float(self.probabilities().sum(dtype=np.float64))
+
+    def save_snapshot(self, directory):
+        path = os.path.join(directory, f'gen_{self.generation:06d}.npy')
+        np.save(path, self.cells)
+        return path
+
+
+def main(size, generations, rule, mode, seed, snapshot_every, output):
+    rng = np.random.default_rng(seed)
+    life = Life3D((size, size, size), rule, mode)
+    life.randomize(rng)
+
+    if snapshot_every:
+        os.makedirs(output, exist_ok=True)
+        life.save_snapshot(output)
+
+    print(f'{mode} {rule} on {size}^3, seed {seed}')
+    for _ in range(generations):
+        start = time.perf_counter()
+        life.step()
+        elapsed = time.perf_counter() - start
+        print(f'generation {life.generation}: population {life.population():.1f} ({elapsed * 1000:.0f} ms)')
+
+        if snapshot_every and life.generation % snapshot_every == 0:
+            life.save_snapshot(output)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='3D Semi Quantum Game of Life')
+    parser.add_argument('--size', type=int, default=64,
+                        help='Board edge length (default: 64)')
+    parser.add_argument('--generations', type=int, default=10,
+                        help='Number of generations (default: 10)')
+    parser.add_argument('--rule', default='B5/S4-5',
+                        help='Birth/survival counts out of 26 neighbours (default: B5/S4-5)')
+    parser.add_argument('--mode', choices=MODES, default='sqgol',
+                        help='Semi quantum or classical rule (default: sqgol)')
+    parser.add_argument('--seed', type=int, default=None,
+                        help='Seed for the random initial board')
+    parser.add_argument('--snapshot-every', type=int, default=0,
+                        help='Save the board every N generations (default: never)')
+    parser.add_argument('--output', default='snapshots',
+                        help='Directory for snapshots (default: snapshots)')
+    args = parser.parse_args()
+
+    main(args.size, args.generations, parse_rule(args.rule), args.mode,
+         args.seed, args.snapshot_every, args.output)
@@ -0,0 +1,91 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'gol_2d'))
+
+from qgol import dmkernel
+from qgol.neighbours import BOUNDARIES
+
+# Two-qubit state qrules.init_quantum prepares on qubits 1 and 2
+PAIR = np.array([2, 1, 0, 1]) / np.sqrt(6)
+
+
+# 8x8 CX gate on 3 qubits, qubit 0 being the least significant bit of the
+# basis index as in qiskit
+def cx_matrix(control, target):
+    gate = np.zeros((8, 8))
+    for i in range(8):
+        gate[i ^ (1 << target) if (i >> control) & 1 else i, i] = 1
+    return gate
+
+
+# The circuit of qrules.init_quantum for one cell, as 8x8 density matrices
+# built gate by gate: the reduced density matrix of qubit 0
+def reference_clone(vector):
+    state = np.array([PAIR[(i >> 1 & 1) + 2 * (i >> 2 & 1)] * vector[i & 1] for i in range(8)])
+    rho = np.outer(state, state)
+    rho = cx_matrix(0, 1) @ rho @ cx_matrix(0, 1).T
+
+    # initialize() on qubit 0 again: trace it out and prepare vector anew
+    blocks = rho.reshape(4, 2, 4, 2)
+    rest = blocks[:, 0, :, 0] + blocks[:, 1, :, 1]
+    rho = np.kron(rest, np.outer(vector, vector))
+
+    for control, target in ((0, 1), (0, 2), (1, 0), (2, 0)):
+        rho = cx_matrix(control, target) @ rho @ cx_matrix(control, target).T
+
+    return np.trace(rho.reshape(4, 2, 4, 2), axis1=0, axis2=2)
+
+
+def random_vectors(rng, shape):
+    angle = rng.random(shape) * np.pi / 2
+    return np.stack([np.cos(angle), np.sin(angle)], axis=-1)
+
+
+def assert_density_matrices(rho):
+    assert np.allclose(np.trace(rho, axis1=-2, axis2=-1), 1)
+    assert np.allclose(rho, np.swapaxes(rho, -1, -2))
+    assert (np.linalg.eigvalsh(rho) > -1e-12).all()
+
+
+def test_clone_matches_the_circuit_cell_by_cell():
+    rng = np.random.default_rng(0)
+    vectors = random_vectors(rng, (4, 6))
+    vectors[0, 0] = [1, 0]
+    vectors[0, 1] = [0, 1]
+
+    cloned = dmkernel.clone(vectors)
+
+    assert cloned.shape == (4, 6, 2, 2)
+    for index in np.ndindex(vectors.shape[:-1]):
+        assert np.allclose(cloned[index], reference_clone(vectors[index]))
+    assert_density_matrices(cloned)
+
+
+def test_clone_of_an_empty_batch():
+    assert dmkernel.clone(np.zeros((0, 2))).shape == (0, 2, 2)
+
+
+def test_pure_density_and_amplitudes_round_trip():
+    vectors = random_vectors(np.random.default_rng(1), (5, 3))
+
+    rho = dmkernel.pure_density(vectors)
+
+    assert np.allclose(rho, np.einsum('xyi,xyj->xyij', vectors, vectors))
+    assert np.allclose(dmkernel.amplitudes(rho), vectors)
+
+
+@pytest.mark.parametrize('boundary', BOUNDARIES)
+def test_dsqgol_step_keeps_density_matrices(boundary):
+    rng = np.random.default_rng(2)
+    vectors = random_vectors(rng, (9, 7))
+    vectors[rng.random((9, 7)) < 0.5] = [0, 1]
+    rho = dmkernel.pure_density(vectors)
+
+    for _ in range(3):
+        rho = dmkernel.dsqgol_step(rho, boundary)
+        assert rho.shape == (9, 7, 2, 2)
+        assert_density_matrices(rho)
@@ -0,0 +1,106 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'gol_2d'))
+
+from qgol.dmkernel import pure_density
+from qgol.editing import EditQueue, brush_offsets
+from qgol.grid import ALIVE, Grid
+from qgol.neighbours import DEAD_EDGES, REFLECT, TORUS
+
+SHAPE = (10, 8)
+
+
+def new_cells(count):
+    return np.tile([np.sqrt(0.5), np.sqrt(0.5)], (count, 1))
+
+
+# Cells made alive by drawing a stroke through the given view cells on empty
+# boards
+def stroke(cells, boundary=TORUS, radius=0, lift_after=None):
+    edits = EditQueue(SHAPE, radius, boundary)
+    grid_quantum, grid_classical = Grid(shape=SHAPE), Grid(shape=SHAPE)
+    edits.begin_stroke(cells[0], grid_classical)
+    for i, cell in enumerate(cells[1:], 1):
+        if i == lift_after:
+            edits.lift()
+        edits.paint(cell)
+    edits.end_stroke()
+    edits.apply(grid_quantum, grid_classical, new_cells)
+    return {tuple(cell) for cell in np.argwhere(grid_classical.grid[..., 0] == 1)}
+
+
+def test_brush_offsets():
+    assert brush_offsets(0).tolist() == [[0, 0]]
+    assert len(brush_offsets(1)) == 9
+    # a round brush: the corners at distance 2 * sqrt(2) are left out
+    offsets = {tuple(o) for o in brush_offsets(2).tolist()}
+    assert len(offsets) == 21
+    assert (2, 2) not in offsets and (2, 1) in offsets
+
+
+def test_brush_at_the_corner_follows_the_boundary():
+    X, Y = SHAPE
+    square = {(0, 0), (0, 1), (1, 0), (1, 1)}
+
+    assert stroke([(0, 0)], TORUS, 1) == square | {(X - 1, Y - 1), (X - 1, 0), (X - 1, 1), (0, Y - 1), (1, Y - 1)}
+    assert stroke([(0, 0)], DEAD_EDGES, 1) == square
+    # the mirrored cells are the edge cells themselves
+    assert stroke([(0, 0)], REFLECT, 1) == square
+    assert stroke([(X - 1, Y - 1)], DEAD_EDGES, 1) == {(X - 2, Y - 2), (X - 2, Y - 1), (X - 1, Y - 2), (X - 1, Y - 1)}
+
+
+@pytest.mark.parametrize('boundary', [TORUS, DEAD_EDGES, REFLECT])
+def test_stroke_across_the_seam_takes_the_short_way(boundary):
+    X, _ = SHAPE
+    # view cells past the right edge are the board's left cells again
+    painted = stroke([(X - 2, 3), (X + 2, 3)], boundary)
+
+    assert painted == {(X - 2, 3), (X - 1, 3), (0, 3), (1, 3), (2, 3)}
+
+
+def test_stroke_fills_the_gaps_of_fast_moves():
+    painted = sorted(stroke([(1, 1), (5, 3)]))
+
+    # one cell per column, each touching the previous one
+    assert [x for x, _ in painted] == [1, 2, 3, 4, 5]
+    assert painted[0] == (1, 1) and painted[-1] == (5, 3)
+    assert all(abs(y1 - y0) <= 1 for (_, y0), (_, y1) in zip(painted, painted[1:]))
+
+
+def test_lift_breaks_the_line():
+    assert stroke([(1, 1), (5, 1), (5, 6)], lift_after=2) == {(x, 1) for x in range(1, 6)} | {(5, 6)}
+
+
+def test_stroke_from_a_live_cell_kills():
+    edits = EditQueue(SHAPE)
+    grid_quantum, grid_classical = Grid(shape=SHAPE), Grid(shape=SHAPE)
+    grid_classical.grid[2:5, 2] = ALIVE
+
+    edits.begin_stroke((2, 2), grid_classical)
+    edits.paint((4, 2))
+    edits.end_stroke()
+
+    assert edits.apply(grid_quantum, grid_classical, new_cells)
+    assert not (grid_classical.grid[..., 0] == 1).any()
+    assert not edits.apply(grid_quantum, grid_classical, new_cells)
+
+
+def test_apply_writes_every_board_and_keeps_the_last_write():
+    edits = EditQueue(SHAPE)
+    grid_quantum, grid_classical, grid_fully_quantum = Grid(shape=SHAPE), Grid(shape=SHAPE), Grid(shape=SHAPE)
+    grid_fully_quantum.grid = pure_density(grid_quantum.grid)
+
+    edits.begin_stroke((3, 3), grid_classical)
+    edits.paint((3, 4))
+    edits.end_stroke()
+    edits.pending.append((np.array([[3, 3]]), False))
+    edits.apply(grid_quantum, grid_classical, new_cells, grid_fully_quantum)
+
+    assert {tuple(c) for c in np.argwhere(grid_classical.grid[..., 0] == 1)} == {(3, 4)}
+    assert np.allclose(grid_quantum.grid[3, 3:5], new_cells(2))
+    assert np.allclose(grid_fully_quantum.grid[3, 3:5], pure_density(new_cells(2)))
+    assert np.allclose(grid_quantum.grid[0, 0], [0, 1])
@@ -0,0 +1,82 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'gol_2d'))
+
+from qgol import kernels
+from qgol.ensemble import Ensemble
+from qgol.liferule import CONWAY
+from qgol.neighbours import BOUNDARIES
+
+
+def quantum_board(alive_probability):
+    a = np.sqrt(alive_probability)
+    return np.stack([a, np.sqrt(1 - a**2)], axis=-1)
+
+
+def test_measurements_follow_the_alive_probabilities():
+    rng = np.random.default_rng(0)
+    p = rng.random((6, 5))
+    size = 20000
+    ensemble = Ensemble(quantum_board(p), size, CONWAY, rng)
+
+    statistics = ensemble.statistics()
+
+    # every cell within 5 standard deviations of its probability
+    sigma = np.sqrt(p * (1 - p) / size)
+    assert (np.abs(statistics['frequency'] - p) < 5 * sigma + 1e-12).all()
+    assert statistics['predicted_population'] == pytest.approx(p.sum())
+    assert statistics['mean_population'] == pytest.approx(p.sum(), abs=5 * np.sqrt((p * (1 - p)).sum() / size))
+    # cells are measured independently, so populations add up their variances
+    assert statistics['std_population'] == pytest.approx(np.sqrt((p * (1 - p)).sum()), rel=0.05)
+    assert statistics['max_divergence'] < 5 * sigma.max()
+
+
+def test_classical_cells_are_measured_exactly():
+    rng = np.random.default_rng(1)
+    alive = rng.random((8, 8)) < 0.4
+    ensemble = Ensemble(quantum_board(alive.astype(float)), 50, CONWAY, rng)
+
+    assert (ensemble.boards == alive).all()
+
+
+@pytest.mark.parametrize('boundary', BOUNDARIES)
+def test_each_board_follows_the_classical_rule(boundary):
+    rng = np.random.default_rng(2)
+    ensemble = Ensemble(quantum_board(np.full((9, 7), 0.4)), 16, CONWAY, rng, boundary)
+    boards = ensemble.boards.copy()
+
+    ensemble.step()
+
+    for before, after in zip(boards, ensemble.boards):
+        board = np.where(before[..., np.newaxis], kernels.ALIVE, kernels.DEAD)
+        expected = kernels.classical_step(board, CONWAY, boundary)[..., 0] == 1
+        assert (after == expected).all()
+    assert ensemble.generation == 1
+
+
+def test_classical_board_matches_sqgol_exactly():
+    rng = np.random.default_rng(3)
+    alive = rng.random((12, 12)) < 0.35
+    ensemble = Ensemble(quantum_board(alive.astype(float)), 4, CONWAY, rng)
+
+    for statistics in ensemble.run(10):
+        assert statistics['max_divergence'] < 1e-9
+        assert statistics['std_population'] == 0
+    assert statistics['generation'] == 10
+
+
+def test_stepped_quantum_board_can_be_passed_in():
+    board = quantum_board(np.random.default_rng(4).random((10, 10)))
+    stepped = Ensemble(board, 100, CONWAY, np.random.default_rng(5))
+    passed = Ensemble(board, 100, CONWAY, np.random.default_rng(5))
+
+    for _ in range(3):
+        stepped.step()
+        passed.step(kernels.sqgol_step(passed.quantum, CONWAY))
+
+    assert np.array_equal(stepped.quantum, passed.quantum)
+    assert np.array_equal(stepped.boards, passed.boards)
@@ -0,0 +1,88 @@
+import os
+import re
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'gol_2d'))
+
+from qgol import dmkernel, equivalence, kernels
+from qgol.liferule import CONWAY
+
+# Small enough for the per-cell oracle, large enough for the glider gun
+SHAPE = (40, 24)
+GENERATIONS = 4
+
+
+@pytest.fixture(scope='module')
+def engines():
+    found = equivalence.engines()
+    yield found
+    for engine in found.values():
+        engine.close()
+
+
+@pytest.mark.parametrize('path', equivalence.seed_files(), ids=os.path.basename)
+def test_seeds(engines, path):
+    grid_quantum, grid_classical = equivalence.seed_grids(path, SHAPE)
+    equivalence.check(grid_quantum, grid_classical, GENERATIONS, engines, os.path.basename(path))
+
+
+@pytest.mark.parametrize('seed', range(4))
+def test_random_boards(engines, seed):
+    grid_quantum, grid_classical = equivalence.random_grids(seed, SHAPE)
+    equivalence.check(grid_quantum, grid_classical, GENERATIONS, engines, f'random board {seed}')
+
+
+# An engine that forgets to wrap around the edges is caught, with the cells
+# that differ in the message
+class NoWrapEngine(equivalence.BatchedEngine):
+    name = 'no-wrap'
+
+    def sqgol_step(self, board, rule, boundary=None):
+        padded = np.pad(board, ((1, 1), (1, 1), (0, 0)), mode='edge')
+        return kernels.sqgol_step(padded, rule)[1:-1, 1:-1]
+
+
+def test_mismatch_reports_cells():
+    grid_quantum, grid_classical = equivalence.random_grids(0, SHAPE)
+    with pytest.raises(AssertionError) as error:
+        equivalence.check(grid_quantum, grid_classical, 1, {'no-wrap': NoWrapEngine()})
+
+    message = str(error.value)
+    assert 'engine no-wrap, generation 1, quantum board' in message
+    assert 'classical board' not in message
+    cells = [(int(x), int(y)) for x, y in re.findall(r'\((\d+), (\d+)\): expected', message)]
+    assert cells
+    assert all(x in (0, SHAPE[0] - 1) or y in (0, SHAPE[1] - 1) for x, y in cells)
+
+
+# Past dead or mirrored edges every engine matches the oracle as well
+@pytest.mark.parametrize('boundary', ['dead', 'reflect'])
+@pytest.mark.parametrize('seed', range(2))
+def test_boundaries(engines, boundary, seed):
+    grid_quantum, grid_classical = equivalence.random_grids(seed, SHAPE)
+    equivalence.check(grid_quantum, grid_classical, GENERATIONS, engines, f'random board {seed}',
+                      boundary=boundary)
+
+
+# The fully quantum board has no oracle without qiskit: past dead or
+# mirrored edges, every engine steps it as the DSQGOL kernel steps it padded
+# with a ring of dead or mirrored cells, ring cropped after
+@pytest.mark.parametrize('boundary', ['dead', 'reflect'])
+def test_fully_quantum_boundaries(engines, boundary):
+    grid_quantum, _ = equivalence.random_grids(1, SHAPE)
+    rho = dmkernel.pure_density(grid_quantum.grid)
+
+    pad = ((1, 1), (1, 1), (0, 0), (0, 0))
+    if boundary == 'dead':
+        padded = np.pad(rho - dmkernel.DEAD_DM, pad) + dmkernel.DEAD_DM
+    else:
+        padded = np.pad(rho, pad, mode='symmetric')
+    expected = dmkernel.dsqgol_step(padded)[1:-1, 1:-1]
+
+    for name, engine in engines.items():
+        if hasattr(engine, 'dsqgol_step'):
+            np.testing.assert_allclose(engine.dsqgol_step(rho, boundary), expected,
+                                       atol=equivalence.TOLERANCE, err_msg=name)
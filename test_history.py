@@ -0,0 +1,128 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'gol_2d'))
+
+from qgol.dmkernel import pure_density
+from qgol.history import History
+
+
+def random_quantum(rng, shape):
+    a = rng.random(shape)
+    return np.stack([a, np.sqrt(1 - a**2)], axis=-1)
+
+
+# Boards of successive generations: each one changes a few random cells of
+# the previous one, and every tenth one changes all of them
+def random_generations(rng, count, shape=(12, 10)):
+    quantum = random_quantum(rng, shape)
+    classical = np.where((rng.random(shape) < 0.5)[..., np.newaxis], [1., 0.], [0., 1.])
+    rho = pure_density(quantum)
+    generations = []
+    for generation in range(count):
+        quantum, classical, rho = quantum.copy(), classical.copy(), rho.copy()
+        if generation % 10 == 9:
+            quantum = random_quantum(rng, shape)
+        else:
+            cells = rng.integers(0, shape, size=(rng.integers(0, 6), 2))
+            quantum[cells[:, 0], cells[:, 1]] = random_quantum(rng, (len(cells),))
+            classical[cells[:, 0], cells[:, 1]] = classical[cells[:, 0], cells[:, 1], ::-1]
+            rho[cells[:, 0], cells[:, 1]] = pure_density(quantum[cells[:, 0], cells[:, 1]])
+        generations.append((quantum, classical, rho))
+    return generations
+
+
+def assert_boards_equal(boards, expected):
+    assert len(boards) == len(expected)
+    for board, original in zip(boards, expected):
+        assert np.array_equal(board, original)
+
+
+def test_random_steps_back_rebuild_the_boards():
+    rng = np.random.default_rng(0)
+    generations = random_generations(rng, 200)
+    history = History(max_bytes=2**30, keyframe_interval=16)
+    for generation, boards in enumerate(generations):
+        history.record(generation, boards)
+
+    assert (history.oldest, history.newest, len(history)) == (0, 199, 200)
+    # deltas, not full copies, for most generations
+    assert len(history.segments) < 100
+    assert all(len(segment.deltas) < 16 for segment in history.segments)
+    for generation in rng.integers(0, 200, size=50):
+        assert_boards_equal(history.get(generation), generations[generation])
+
+
+def test_get_returns_copies():
+    rng = np.random.default_rng(1)
+    generations = random_generations(rng, 5)
+    history = History()
+    for generation, boards in enumerate(generations):
+        history.record(generation, boards)
+    generations[2][0][...] = 0
+
+    history.get(3)[0][...] = 0
+
+    assert np.any(history.get(2)[0] != 0)
+    assert np.any(history.get(3)[0] != 0)
+
+
+def test_eviction_keeps_the_newest_generations_within_budget():
+    rng = np.random.default_rng(2)
+    generations = random_generations(rng, 300)
+    one_generation = sum(board.nbytes for board in generations[0])
+    max_bytes = 8 * one_generation
+    history = History(max_bytes=max_bytes, keyframe_interval=8)
+    for generation, boards in enumerate(generations):
+        history.record(generation, boards)
+        assert history.nbytes <= max_bytes or len(history.segments) == 1
+        assert history.nbytes == sum(segment.nbytes for segment in history.segments)
+
+    assert history.newest == 299
+    assert history.oldest > 0
+    assert history.oldest - 1 not in history
+    with pytest.raises(KeyError):
+        history.get(history.oldest - 1)
+    for generation in rng.integers(history.oldest, 300, size=30):
+        assert_boards_equal(history.get(generation), generations[generation])
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_recording_after_stepping_back_forgets_the_future(seed):
+    rng = np.random.default_rng(seed)
+    generations = random_generations(rng, 120)
+    history = History(keyframe_interval=16)
+    for generation, boards in enumerate(generations):
+        history.record(generation, boards)
+
+    # step back to a random generation and continue differently from there
+    back = int(rng.integers(1, 120))
+    branch = random_generations(rng, 30)
+    for offset, boards in enumerate(branch):
+        history.record(back + offset, boards)
+
+    assert (history.oldest, history.newest) == (0, back + 29)
+    assert history.nbytes == sum(segment.nbytes for segment in history.segments)
+    for generation in rng.integers(0, back, size=20):
+        assert_boards_equal(history.get(generation), generations[generation])
+    for offset in rng.integers(0, 30, size=20):
+        assert_boards_equal(history.get(back + offset), branch[offset])
+
+
+def test_gap_or_new_shape_starts_over():
+    rng = np.random.default_rng(3)
+    generations = random_generations(rng, 10)
+    history = History()
+    for generation, boards in enumerate(generations):
+        history.record(generation, boards)
+
+    history.record(20, generations[0])
+    assert (history.oldest, history.newest) == (20, 20)
+
+    resized = random_generations(rng, 1, shape=(5, 7))[0]
+    history.record(21, resized)
+    assert_boards_equal(history.get(20), generations[0])
+    assert_boards_equal(history.get(21), resized)
@@ -0,0 +1,98 @@
+import itertools
+import math
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'gol_3d'))
+
+from life3d import NEIGHBOURS, Life3D, parse_rule
+
+RULE = 'B5-7,12/S4-6,13,14'
+
+OFFSETS = [offset for offset in itertools.product((-1, 0, 1), repeat=3) if offset != (0, 0, 0)]
+
+
+# Sum of the 26 neighbours of cell (x, y, z) of a periodic board, one by one
+def reference_liveliness(cells, x, y, z):
+    X, Y, Z = cells.shape
+    return sum(float(cells[(x + dx) % X, (y + dy) % Y, (z + dz) % Z]) for dx, dy, dz in OFFSETS)
+
+
+def reference_classical_step(cells, rule):
+    new = np.zeros_like(cells)
+    for x, y, z in np.ndindex(cells.shape):
+        count = int(reference_liveliness(cells, x, y, z))
+        new[x, y, z] = count in (rule.survival if cells[x, y, z] else rule.birth)
+    return new
+
+
+# SQGOL for one cell, straight from the birth and survival counts: between
+# the nodes at n and n + 1 the cell is (sqrt(2) + 1) * (n + 1 - a) times the
+# first plus (a - n) times the second, normalized
+def reference_sqgol_cell(value, a, rule):
+    def node(count):
+        if count in rule.birth and count in rule.survival:
+            return np.array([1.0, 0.0])
+        if count in rule.survival:
+            return value
+        if count in rule.birth:
+            return value[::-1]
+        return np.array([0.0, 1.0])
+
+    n = min(max(math.ceil(a) - 1, 0), NEIGHBOURS - 1)
+    new = (math.sqrt(2) + 1) * (n + 1 - a) * node(n) + (a - n) * node(n + 1)
+    return new / np.linalg.norm(new)
+
+
+def reference_sqgol_step(cells, rule):
+    new = np.zeros_like(cells)
+    for x, y, z in np.ndindex(cells.shape):
+        value = np.array([cells[x, y, z], math.sqrt(1 - cells[x, y, z]**2)])
+        new[x, y, z] = reference_sqgol_cell(value, reference_liveliness(cells, x, y, z), rule)[0]
+    return new
+
+
+def random_life(mode, seed, shape=(4, 5, 6)):
+    rng = np.random.default_rng(seed)
+    life = Life3D(shape, parse_rule(RULE), mode, dtype=np.float64)
+    occupied = rng.random(shape) < 0.4
+    if mode == 'classical':
+        life.cells[...] = occupied
+    else:
+        life.cells[...] = np.where(occupied, rng.random(shape), 0)
+    return life
+
+
+def test_parse_rule():
+    rule = parse_rule('B5,6/S4-5,17')
+
+    assert rule.neighbours == NEIGHBOURS
+    assert rule.birth == {5, 6}
+    assert rule.survival == {4, 5, 17}
+    assert str(rule) == 'B5,6/S4,5,17'
+    assert parse_rule(str(rule)).classical_table.tolist() == rule.classical_table.tolist()
+    with pytest.raises(ValueError):
+        parse_rule('B27/S4')
+
+
+@pytest.mark.parametrize('seed', [0, 1, 2])
+def test_classical_step_matches_reference(seed):
+    life = random_life('classical', seed)
+    expected = reference_classical_step(life.cells, life.rule)
+
+    life.step()
+
+    assert np.array_equal(life.cells, expected)
+
+
+@pytest.mark.parametrize('seed', [0, 1, 2])
+def test_sqgol_step_matches_reference(seed):
+    life = random_life('sqgol', seed)
+    expected = reference_sqgol_step(life.cells, life.rule)
+
+    life.step()
+
+    assert np.allclose(life.cells, expected, atol=1e-9)
@@ -0,0 +1,114 @@
+import csv
+import math
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'gol_2d'))
+
+from qgol.dmkernel import pure_density
+from qgol.observables import COLUMNS, ColumnLog, measure
+
+
+def quantum_board(alive):
+    alive = np.asarray(alive, dtype=float)
+    return np.stack([alive, np.sqrt(1 - alive**2)], axis=-1)
+
+
+def classical_board(alive):
+    alive = np.asarray(alive, dtype=bool)
+    return np.where(alive[..., np.newaxis], [1., 0.], [0., 1.])
+
+
+# 3x3 boards: one live cell, one cell alive with probability 1/2 and one
+# with probability 1/4 on the quantum board, two live cells on the classical one
+def known_boards():
+    quantum = quantum_board([[1, 0, 0],
+                             [0, math.sqrt(0.5), 0],
+                             [0, 0, 0.5]])
+    classical = classical_board([[0, 1, 0],
+                                 [0, 1, 0],
+                                 [0, 0, 0]])
+    return quantum, classical
+
+
+def binary_entropy(p):
+    return -p * math.log2(p) - (1 - p) * math.log2(1 - p)
+
+
+def test_measure_known_board():
+    quantum, classical = known_boards()
+    values = measure(7, quantum, classical)
+
+    assert values['generation'] == 7
+    assert values['alive_probability'] == pytest.approx(1 + 0.5 + 0.25)
+    assert values['classical_population'] == 2
+    assert values['superposed'] == 2
+    assert values['entropy'] == pytest.approx(binary_entropy(0.5) + binary_entropy(0.25))
+    assert [values[name] for name in COLUMNS[5:9]] == [-1, -1, -1, -1]
+    assert math.isnan(values['fully_quantum_alive_probability'])
+    assert values['fully_quantum_superposed'] == -1
+
+
+def test_measure_fully_quantum_board():
+    quantum, classical = known_boards()
+    values = measure(0, quantum, classical, fully_quantum=pure_density(quantum))
+
+    assert values['fully_quantum_alive_probability'] == pytest.approx(values['alive_probability'])
+    assert values['fully_quantum_superposed'] == values['superposed']
+    assert values['fully_quantum_entropy'] == pytest.approx(values['entropy'])
+
+
+def test_active_box_ignores_rounding():
+    quantum, classical = known_boards()
+    previous_quantum, previous_classical = quantum.copy(), classical.copy()
+    quantum[..., 0] += 1e-12
+    quantum[0, 2, 0] = 0.3
+    classical[2, 1] = [1., 0.]
+
+    values = measure(1, quantum, classical, previous_quantum, previous_classical)
+
+    assert [values[name] for name in COLUMNS[5:9]] == [0, 1, 2, 2]
+
+    values = measure(1, previous_quantum + 1e-12, previous_classical, previous_quantum, previous_classical)
+
+    assert [values[name] for name in COLUMNS[5:9]] == [-1, -1, -1, -1]
+
+
+def test_csv_round_trip(tmp_path):
+    quantum, classical = known_boards()
+    rows = [measure(0, quantum, classical),
+            measure(1, quantum, classical, quantum, classical, pure_density(quantum))]
+    path = str(tmp_path / 'log.csv')
+    with ColumnLog(path) as log:
+        for row in rows:
+            log.write(row)
+
+    with open(path, newline='') as f:
+        read = list(csv.DictReader(f))
+
+    assert [list(row) for row in read] == [list(COLUMNS)] * 2
+    for row, expected in zip(read, rows):
+        for name in COLUMNS:
+            value = float(row[name])
+            if math.isnan(expected[name]):
+                assert math.isnan(value)
+            else:
+                assert value == pytest.approx(expected[name])
+
+
+def test_parquet_round_trip(tmp_path):
+    parquet = pytest.importorskip('pyarrow.parquet')
+    quantum, classical = known_boards()
+    path = str(tmp_path / 'log.parquet')
+    with ColumnLog(path, row_group_size=2) as log:
+        for generation in range(5):
+            log.write(measure(generation, quantum, classical))
+
+    table = parquet.read_table(path)
+
+    assert table.column_names == list(COLUMNS)
+    assert table.column('generation').to_pylist() == list(range(5))
+    assert table.column('classical_population').to_pylist() == [2] * 5
@@ -0,0 +1,80 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'gol_2d'))
+
+from qgol.render import BLANK_SPACE, VideoWriter, classical_shades, compose_frame, quantum_shades, to_image
+
+
+def random_boards(rng, shape=(5, 3)):
+    a = rng.random(shape)
+    quantum = np.stack([a, np.sqrt(1 - a**2)], axis=-1)
+    alive = rng.random(shape) < 0.5
+    classical = np.where(alive[..., np.newaxis], [1., 0.], [0., 1.])
+    return quantum, classical
+
+
+def expected_grey(quantum):
+    return (255 - np.floor(quantum[..., 1]**2 * 255)).astype(np.uint8)
+
+
+def test_quantum_shades_are_the_dead_probability():
+    quantum = np.array([[[1., 0.], [0., 1.]],
+                        [[np.sqrt(0.5), np.sqrt(0.5)], [0.6, 0.8]]])
+
+    assert quantum_shades(quantum).tolist() == [[255, 0], [128, 92]]
+    quantum, _ = random_boards(np.random.default_rng(0))
+    assert np.array_equal(quantum_shades(quantum), expected_grey(quantum))
+
+
+def test_to_image_is_transposed_grey():
+    quantum, _ = random_boards(np.random.default_rng(1))
+    image = to_image(quantum_shades(quantum))
+
+    assert image.shape == (3, 5, 3)
+    assert image.dtype == np.uint8
+    for x, y in np.ndindex(quantum.shape[:2]):
+        assert image[y, x].tolist() == [expected_grey(quantum)[x, y]] * 3
+
+
+def test_to_image_draws_cell_borders():
+    shades = np.array([[200]], dtype=np.uint8)
+    image = to_image(shades, pixel_size=10, line_width=4)[..., 0]
+
+    assert image.shape == (10, 10)
+    # a 4 pixel border around a 2x2 black hole
+    assert (image[4:6, 4:6] == 0).all()
+    image[4:6, 4:6] = 200
+    assert (image == 200).all()
+
+
+def test_compose_frame_layout_and_colours():
+    rng = np.random.default_rng(2)
+    quantum, classical = random_boards(rng)
+    fully_quantum, _ = random_boards(rng)
+    pixel_size, interspace = 2, 3
+
+    frame = compose_frame(classical, quantum, pixel_size, None, interspace, fully_quantum)
+
+    height, width = 3 * pixel_size, 5 * pixel_size
+    assert frame.shape == (height, 3 * width + 2 * interspace, 3)
+    panels = [frame[:, i * (width + interspace):i * (width + interspace) + width] for i in range(3)]
+    gaps = [frame[:, i * (width + interspace) + width:(i + 1) * (width + interspace)] for i in range(2)]
+
+    classical_colours = np.where(classical[..., 0] == 1, 255, 0)
+    for panel, grey in zip(panels, (classical_colours, expected_grey(quantum), expected_grey(fully_quantum))):
+        for x, y in np.ndindex(grey.shape):
+            cell = panel[y * pixel_size:(y + 1) * pixel_size, x * pixel_size:(x + 1) * pixel_size]
+            assert (cell == grey[x, y]).all()
+    for gap in gaps:
+        assert (gap == BLANK_SPACE).all()
+    assert set(np.unique(panels[0])) <= {0, 255}
+    assert np.array_equal(classical_shades(classical), classical_colours)
+
+
+def test_video_writer_needs_the_encoder(tmp_path):
+    with pytest.raises(RuntimeError, match='not-an-encoder'):
+        VideoWriter(str(tmp_path / 'out.mp4'), encoder='not-an-encoder')
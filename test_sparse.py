@@ -0,0 +1,142 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'gol_2d'))
+
+from qgol import dmkernel, kernels, sparse
+from qgol.backends import available_backends, get_backend
+from qgol.liferule import CONWAY, LifeRule
+
+CHUNK_SIZE = 8
+
+# Glider moving towards growing x and y
+GLIDER = [(0, 1), (1, 2), (2, 0), (2, 1), (2, 2)]
+
+
+@pytest.fixture(scope='module', params=available_backends())
+def backend(request):
+    backend = get_backend(request.param, workers=2)
+    yield backend
+    backend.close()
+
+
+def dead_board(shape):
+    return np.tile(kernels.DEAD, shape + (1,))
+
+
+def glider_board(shape, origin, direction=1):
+    board = dead_board(shape)
+    for x, y in GLIDER:
+        board[origin[0] + direction * x, origin[1] + direction * y] = kernels.ALIVE
+    return board
+
+
+def random_patch(rng, shape):
+    a = np.where(rng.random(shape) < 0.5, rng.random(shape), 0)
+    return np.stack([a, np.sqrt(1 - a**2)], axis=-1)
+
+
+# Steps a dense torus board large enough for nothing to reach its edges and
+# the same cells on an unbounded board, and checks they agree every generation
+def run_both(dense, dense_step, sparse_step, generations, dead=kernels.DEAD):
+    board = sparse.SparseBoard.from_dense(dense, dead, CHUNK_SIZE)
+    for _ in range(generations):
+        dense = dense_step(dense)
+        board = sparse_step(board)
+        assert np.allclose(board.window((0, 0), dense.shape[:2]), dense)
+    return board
+
+
+def test_glider_matches_dense(backend):
+    dense = glider_board((48, 48), (4, 4))
+
+    board = run_both(dense, lambda b: kernels.classical_step(b, CONWAY),
+                     lambda b: sparse.classical_step(b, CONWAY, backend), 40)
+
+    # the glider moved 10 cells diagonally, into other chunks
+    assert board.bounds() == (14, 14, 16, 16)
+
+
+def test_quantum_seed_matches_dense(backend):
+    rng = np.random.default_rng(1)
+    dense = dead_board((40, 40))
+    dense[15:25, 15:25] = random_patch(rng, (10, 10))
+
+    run_both(dense, lambda b: kernels.sqgol_step(b, CONWAY),
+             lambda b: sparse.sqgol_step(b, CONWAY, backend), 8)
+
+
+def test_fully_quantum_seed_matches_dense(backend):
+    rng = np.random.default_rng(2)
+    dense = dmkernel.pure_density(dead_board((24, 24)))
+    dense[9:15, 9:15] = dmkernel.pure_density(random_patch(rng, (6, 6)))
+
+    run_both(dense, dmkernel.dsqgol_step, lambda b: sparse.dsqgol_step(b, backend), 3, dmkernel.DEAD_DM)
+
+
+def test_backends_agree():
+    rng = np.random.default_rng(3)
+    dense = dead_board((20, 20))
+    dense[6:14, 6:14] = random_patch(rng, (8, 8))
+    boards = []
+    for name in available_backends():
+        backend = get_backend(name, workers=2)
+        board = sparse.SparseBoard.from_dense(dense, kernels.DEAD, CHUNK_SIZE)
+        for _ in range(4):
+            board = sparse.sqgol_step(board, CONWAY, backend)
+        backend.close()
+        boards.append(board)
+
+    for board in boards[1:]:
+        assert board.chunks.keys() == boards[0].chunks.keys()
+        assert np.allclose(board.window((-8, -8), (40, 40)), boards[0].window((-8, -8), (40, 40)))
+
+
+def test_glider_crosses_into_negative_chunks():
+    dense = glider_board((48, 48), (40, 40), direction=-1)
+    board = sparse.SparseBoard.from_dense(dense, kernels.DEAD, CHUNK_SIZE, origin=(-40, -40))
+    for _ in range(40):
+        dense = kernels.classical_step(dense, CONWAY)
+        board = sparse.classical_step(board, CONWAY)
+
+    assert np.array_equal(board.window((-40, -40), (48, 48)), dense)
+    assert board.bounds() == (-12, -12, -10, -10)
+    assert all(cx < 0 and cy < 0 for cx, cy in board.chunks)
+
+
+def test_chunks_are_allocated_and_freed():
+    board = sparse.SparseBoard.from_dense(glider_board((48, 48), (4, 4)), kernels.DEAD, CHUNK_SIZE)
+    assert set(board.chunks) == {(0, 0)}
+
+    seen = set()
+    for _ in range(40):
+        board = sparse.classical_step(board, CONWAY)
+        seen |= set(board.chunks)
+        # a glider spans at most 2x2 chunks, the ones it left are freed
+        assert 1 <= len(board) <= 4
+        assert all(board.alive_cells(chunk[np.newaxis]).any() for chunk in board.chunks.values())
+
+    assert (0, 0) not in board.chunks
+    assert {(1, 1), (2, 2)} <= seen
+
+
+def test_dying_board_frees_every_chunk():
+    dense = dead_board((16, 16))
+    dense[3, 3] = dense[12, 12] = kernels.ALIVE
+    board = sparse.SparseBoard.from_dense(dense, kernels.DEAD, CHUNK_SIZE)
+    assert len(board) == 2
+
+    board = sparse.classical_step(board, CONWAY)
+
+    assert len(board) == 0
+    assert board.nbytes == 0
+    assert board.bounds() is None
+
+
+def test_birth_on_empty_space_is_refused():
+    board = sparse.SparseBoard(kernels.DEAD, CHUNK_SIZE)
+    with pytest.raises(ValueError):
+        sparse.classical_step(board, LifeRule.parse('B03/S23'))
@@ -0,0 +1,85 @@
+import importlib.util
+import math
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'gol_1d'))
+
+import onedgameoflife
+import sparsestate
+from rules import DEFAULT_RULE, Rule1D
+
+# Small rings, with the superposed cells placed unevenly so the order of
+# the cells in the summary keys matters
+CASES = [
+    ('XXX', DEFAULT_RULE),
+    ('1X0X', DEFAULT_RULE),
+    ('X1X00X', DEFAULT_RULE),
+    ('0X11X0X', Rule1D.parse('R1/B1/S12')),
+    ('X0X1100', Rule1D.parse('R2/B23/S1')),
+]
+
+HAS_QISKIT = importlib.util.find_spec('qiskit') is not None
+
+
+def assert_same_summary(expected, actual):
+    assert set(expected) == set(actual)
+    for cells, value in expected.items():
+        assert actual[cells] == pytest.approx(value)
+
+
+# Statevector of the first generation as the oracle circuit leaves it,
+# built from the truth tables the oracle is made of: every input ring x of
+# the variable register holds its initial amplitude, with rule(x) in the
+# output register. Outputs are the most significant qubits, as for the
+# circuit once the ancillas are dropped.
+def first_generation_summary(init_cells, rule):
+    size = len(init_cells)
+    bitmaps = rule.bitmaps(size)
+    state = np.zeros(2**(2 * size), dtype=complex)
+    for x in range(2**size):
+        amplitude = 1
+        for i, v in enumerate(init_cells[::-1]):
+            bit = (x >> i) & 1
+            if v == '0' or v == '1':
+                amplitude *= bit == int(v)
+            else:
+                amplitude /= math.sqrt(2)
+        output = sum(int(bitmaps[i][x]) << i for i in range(size))
+        state[x + (output << size)] += amplitude
+
+    return onedgameoflife.vector_state_to_summary(state, lambda index: index[:size])
+
+
+@pytest.mark.parametrize('init_cells, rule', CASES)
+def test_first_generation_matches_statevector(init_cells, rule):
+    _, summary = next(sparsestate.run_generations(init_cells, 1, rule))
+    assert_same_summary(first_generation_summary(init_cells, rule), summary)
+
+
+@pytest.mark.skipif(not HAS_QISKIT, reason='needs qiskit')
+@pytest.mark.parametrize('init_cells, rule', CASES[:3])
+def test_matches_qiskit(init_cells, rule):
+    dense = list(onedgameoflife.run_generations(init_cells, 3, rule=rule))
+    sparse = list(sparsestate.run_generations(init_cells, 3, rule))
+
+    assert_same_summary(dense[0][1], sparse[0][1])
+    # later dense generations follow one measured initial state
+    for (_, dense_summary), (_, sparse_summary) in zip(dense[1:], sparse[1:]):
+        assert len(dense_summary) == 1
+        cells, value = next(iter(dense_summary.items()))
+        assert cells in sparse_summary
+        assert abs(value) == pytest.approx(1)
+
+
+def test_long_ring():
+    init_cells = '0110X00X' + '0' * 300 + 'X'
+    summaries = list(sparsestate.run_generations(init_cells, 5))
+    assert len(summaries) == 5
+    for _, summary in summaries:
+        assert 0 < len(summary) <= 8
+        assert all(len(cells) == len(init_cells) for cells in summary)
+        assert sum(summary.values()) == pytest.approx(math.sqrt(8))
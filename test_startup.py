@@ -0,0 +1,38 @@
+import os
+import subprocess
+import sys
+import time
+
+GOL_2D = os.path.join(os.path.dirname(__file__), 'gol_2d')
+
+# Seconds importing the engine may add on top of numpy, which it needs anyway.
+# Sweeps start hundreds of worker processes that import it.
+IMPORT_BUDGET = 0.5
+
+
+# Wall time of a fresh interpreter running code from gol_2d, and its output
+def run(code):
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, '-c', code], cwd=GOL_2D,
+                            capture_output=True, text=True, check=True)
+    return time.perf_counter() - start, result.stdout
+
+
+def test_engine_import_skips_gui_and_optional_packages():
+    _, output = run("import sys, qgol; "
+                    "print([m for m in ('pygame', 'thorpy', 'qiskit', 'numba') if m in sys.modules])")
+    assert output.strip() == '[]'
+
+
+def test_engine_import_time():
+    baseline = min(run('import numpy')[0] for _ in range(3))
+    elapsed = min(run('import qgol')[0] for _ in range(3))
+    print(f'import qgol: {elapsed:.3f}s, numpy alone: {baseline:.3f}s')
+    assert elapsed - baseline < IMPORT_BUDGET
+
+
+def test_engine_runs_without_display():
+    _, output = run("import numpy as np, qgol; "
+                    "grid = qgol.Grid(qgol.random_cells((8, 8), 0.51, 0.48, np.random.default_rng(0))); "
+                    "print(qgol.SQGOL(grid.getNeighboursAround(3, 3)).shape)")
+    assert output.strip() == '(2,)'
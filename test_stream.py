@@ -0,0 +1,148 @@
+import asyncio
+import json
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'gol_2d'))
+
+from qgol.render import classical_shades, quantum_shades
+from qgol import stream as stream_module
+from qgol.stream import BoardStream, decode_update
+
+
+def random_boards(rng, shape=(30, 20)):
+    a = rng.random(shape)
+    quantum = np.stack([a, np.sqrt(1 - a**2)], axis=-1)
+    alive = rng.random(shape) < 0.3
+    classical = np.where(alive[..., np.newaxis], [1., 0.], [0., 1.])
+    return quantum, classical
+
+
+async def connect_events(port):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port, limit=2**24)
+    writer.write(b'GET /events HTTP/1.1\r\nHost: localhost\r\n\r\n')
+    await writer.drain()
+    while (await reader.readline()) != b'\r\n':
+        pass
+    return reader, writer
+
+
+async def next_frame(reader):
+    while True:
+        line = await asyncio.wait_for(reader.readline(), 5)
+        if line.startswith(b'data: '):
+            return json.loads(line[6:])
+
+
+def test_viewer_page():
+    stream = BoardStream(port=0).start()
+    try:
+        async def get_page():
+            reader, writer = await asyncio.open_connection('127.0.0.1', stream.port)
+            writer.write(b'GET / HTTP/1.1\r\nHost: localhost\r\n\r\n')
+            response = await reader.read()
+            writer.close()
+            return response
+
+        response = asyncio.run(get_page())
+        assert response.startswith(b'HTTP/1.1 200 OK')
+        assert b'EventSource' in response
+    finally:
+        stream.close()
+
+
+def test_deltas_rebuild_boards():
+    rng = np.random.default_rng(0)
+    stream = BoardStream(port=0).start()
+    try:
+        async def run():
+            boards = [random_boards(rng) for _ in range(4)]
+            stream.publish(0, *boards[0])
+            reader, writer = await connect_events(stream.port)
+
+            shades = None
+            for generation, (quantum, classical) in enumerate(boards):
+                if generation > 0:
+                    stream.publish(generation, quantum, classical)
+                frame = await next_frame(reader)
+                assert frame['generation'] == generation
+                assert frame['keyframe'] == (generation == 0)
+
+                shape = (frame['width'], frame['height'])
+                previous = shades or (None, None)
+                shades = (decode_update(frame['classical'], previous[0], shape),
+                          decode_update(frame['quantum'], previous[1], shape))
+                assert (shades[0] == classical_shades(classical)).all()
+                assert (shades[1] == quantum_shades(quantum)).all()
+            writer.close()
+
+        asyncio.run(run())
+    finally:
+        stream.close()
+
+
+def test_slow_client_drops_frames_and_resyncs():
+    rng = np.random.default_rng(1)
+    stream = BoardStream(port=0, max_queue=2).start()
+    try:
+        async def run():
+            reader, writer = await connect_events(stream.port)
+            while not stream.clients:
+                await asyncio.sleep(0.01)
+
+            # publishing never waits for the client, which is not reading and
+            # soon has its socket buffers full with these large boards
+            for generation in range(50):
+                quantum, classical = random_boards(rng, (300, 300))
+                stream.publish(generation, quantum, classical)
+            await asyncio.sleep(0.2)
+            assert stream.dropped > 0
+
+            # every frame the client got still applies, thanks to a new
+            # keyframe after the dropped ones
+            stream.publish(50, quantum, classical)
+            shades = None
+            keyframes = 0
+            frame = {'generation': None}
+            while frame['generation'] != 50:
+                frame = await next_frame(reader)
+                keyframes += frame['keyframe']
+                shades = decode_update(frame['quantum'], shades, (frame['width'], frame['height']))
+            assert keyframes >= 2
+            assert (shades == quantum_shades(quantum)).all()
+            writer.close()
+
+        asyncio.run(run())
+    finally:
+        stream.close()
+
+
+def test_nothing_is_encoded_without_clients(monkeypatch):
+    rng = np.random.default_rng(2)
+    stream = BoardStream(port=0).start()
+    try:
+        def fail(*args):
+            raise AssertionError('encoded a frame with no client connected')
+
+        monkeypatch.setattr(stream_module, 'encode_delta', fail)
+        monkeypatch.setattr(stream_module, 'encode_keyframe', fail)
+        for generation in range(5):
+            quantum, classical = random_boards(rng)
+            stream.publish(generation, quantum, classical)
+        monkeypatch.undo()
+
+        # a client connecting later still gets the latest generation
+        async def run():
+            reader, writer = await connect_events(stream.port)
+            frame = await next_frame(reader)
+            assert frame['generation'] == 4
+            assert frame['keyframe']
+            shades = decode_update(frame['quantum'], None, (frame['width'], frame['height']))
+            assert (shades == quantum_shades(quantum)).all()
+            writer.close()
+
+        asyncio.run(run())
+    finally:
+        stream.close()
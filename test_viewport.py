@@ -0,0 +1,110 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'gol_2d'))
+
+from qgol.render import shade
+from qgol.viewport import ZOOM_LEVELS, Camera
+
+BOARD_SHAPE = (50, 30)
+VIEW_SIZE = (200, 120)
+
+
+def camera_at(level, origin):
+    camera = Camera(BOARD_SHAPE, VIEW_SIZE)
+    camera.level = level
+    camera.origin = list(origin)
+    return camera
+
+
+def levels():
+    return range(Camera(BOARD_SHAPE, VIEW_SIZE).max_level + 1)
+
+
+def test_zoom_stops_at_the_first_level_showing_the_whole_board():
+    camera = Camera(BOARD_SHAPE, VIEW_SIZE)
+
+    assert all(count >= size for count, size in zip(camera.counts(camera.max_level), BOARD_SHAPE))
+    assert any(count < size for count, size in zip(camera.counts(camera.max_level - 1), BOARD_SHAPE))
+    camera.zoom(-len(ZOOM_LEVELS))
+    assert camera.level == camera.max_level
+    camera.zoom(len(ZOOM_LEVELS))
+    assert camera.level == 0
+    camera.home()
+    assert camera.pixels == 10 and camera.origin == [0, 0]
+
+
+@pytest.mark.parametrize('level', levels())
+def test_screen_and_cell_round_trip(level):
+    rng = np.random.default_rng(level)
+    for origin in rng.integers(0, BOARD_SHAPE, size=(5, 2)):
+        camera = camera_at(level, origin)
+        for px, py in rng.integers(0, VIEW_SIZE, size=(50, 2)):
+            view_x, view_y = camera.screen_to_view_cell(px, py)
+            x, y = camera.screen_to_cell(px, py)
+            assert (x, y) == (view_x % BOARD_SHAPE[0], view_y % BOARD_SHAPE[1])
+            # cells shown twice (the view is larger than the board) map
+            # back to their first copy
+            if view_x - camera.origin[0] < BOARD_SHAPE[0] and view_y - camera.origin[1] < BOARD_SHAPE[1]:
+                assert camera.cell_to_screen(x, y) == (px // camera.pixels * camera.pixels,
+                                                       py // camera.pixels * camera.pixels)
+
+
+def test_view_cells_do_not_wrap_across_the_seam():
+    camera = camera_at(5, (BOARD_SHAPE[0] - 1, 0))
+
+    assert camera.screen_to_view_cell(0, 0) == (BOARD_SHAPE[0] - 1, 0)
+    assert camera.screen_to_view_cell(camera.pixels, 0) == (BOARD_SHAPE[0], 0)
+    assert camera.screen_to_cell(camera.pixels, 0) == (0, 0)
+    assert camera.cell_to_screen(0, 0) == (camera.pixels, 0)
+    assert camera.cell_to_screen(BOARD_SHAPE[0] // 2, 0) is None
+
+
+@pytest.mark.parametrize('steps', [1, -1, 3, -4])
+def test_zoom_keeps_the_anchored_cell(steps):
+    rng = np.random.default_rng(abs(steps))
+    for level in levels():
+        for anchor in rng.integers(0, VIEW_SIZE, size=(5, 2)):
+            camera = camera_at(level, rng.integers(0, BOARD_SHAPE))
+            cell = camera.screen_to_cell(*anchor)
+            camera.zoom(steps, tuple(anchor))
+            assert camera.screen_to_cell(*anchor) == cell
+
+
+def test_pan_accumulates_pixels():
+    camera = Camera(BOARD_SHAPE, VIEW_SIZE)
+    camera.pan(4, 0)
+    assert camera.origin == [0, 0]
+    camera.pan(6, -25)
+    # the board follows the pointer, whole cells at a time, wrapping around
+    assert camera.origin == [BOARD_SHAPE[0] - 1, 3]
+    camera.pan(0, 4)
+    assert camera.origin == [BOARD_SHAPE[0] - 1, 3]
+    camera.pan(0, 1)
+    assert camera.origin == [BOARD_SHAPE[0] - 1, 2]
+
+
+def test_zoomed_out_blocks_are_reduced():
+    shape = (500, 300)
+    rng = np.random.default_rng(0)
+    a = rng.random(shape)
+    board = np.stack([a, np.sqrt(1 - a**2)], axis=-1)
+    camera = Camera(shape, VIEW_SIZE)
+    while camera.block < 2:
+        camera.zoom(-1)
+    origin = list(camera.origin)
+    camera.pan(3 * camera.pixels, -5 * camera.pixels)
+
+    image = camera.render_quantum(board)
+
+    counts = camera.counts()
+    xs = (camera.origin[0] + np.arange(counts[0])) % shape[0]
+    ys = (camera.origin[1] + np.arange(counts[1])) % shape[1]
+    dead = board[np.ix_(xs, ys)][..., 1]**2
+    expected = shade(dead.reshape(counts[0] // 2, 2, counts[1] // 2, 2).mean(axis=(1, 3)))
+    assert camera.origin == [(origin[0] - 6) % shape[0], (origin[1] + 10) % shape[1]]
+    assert image.shape == (VIEW_SIZE[1], VIEW_SIZE[0], 3)
+    assert np.array_equal(image[..., 0], expected.T[:VIEW_SIZE[1], :VIEW_SIZE[0]])